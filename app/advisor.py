@@ -0,0 +1,102 @@
+"""
+Index advisor for POST /notices.
+
+Runs EXPLAIN QUERY PLAN for the statements get_notices issues (materializing the
+filtered set, the first page, a keyset page) over a library of representative
+NoticeFilterRequest payloads and flags full table scans and temp B-tree sorts.
+"""
+import json
+
+from sqlalchemy import literal_column, tuple_
+
+from app.db import NoticeModel
+from app.models import NoticeFilterRequest
+from app.notice_query import build_notice_query, notice_facet_fields
+
+# Representative /notices payloads (landing pages, facet clicks, date ranges, keywords)
+SAMPLE_NOTICE_REQUESTS = [
+    {"sector": "三市公告"},
+    {"sector": "科创板反馈问答"},
+    {"sector": "三市公告", "page": 200},
+    {"sector": "三市公告", "start_date": "2023-01-01", "end_date": "2023-12-31"},
+    {"sector": "三市公告", "stock_code": ["000001", "600000"]},
+    {"sector": "三市公告", "notice_type": ["年度报告"]},
+    {"sector": "三市公告", "industry": ["银行"], "province": ["广东"]},
+    {"sector": "三市公告", "market_type": ["1"], "province_exclude": ["北京"]},
+    {"sector": "债券公告", "publisher": ["某发行人"], "category": ["公司债"]},
+    {"sector": "科创板反馈问答", "intermediary_type": ["保荐机构"], "intermediary_name": ["中信证券"]},
+    {"sector": "三市公告", "title_search_all": "年度报告 摘要"},
+    {"sector": "三市公告", "content_search_any": "收购 重组"},
+    {"sector": "科创板反馈问答", "aq_search_all": ["研发投入"], "start_date": "2022-01-01", "end_date": "2022-06-30"},
+]
+
+PROBLEM_MARKERS = {
+    "full scan": lambda detail: detail.startswith("SCAN ") and " USING " not in detail,
+    "temp sort": lambda detail: "USE TEMP B-TREE" in detail,
+}
+
+
+def explain_plan(db_session, statement):
+    bind = db_session.get_bind()
+    compiled = statement.compile(dialect=bind.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [r[3] for r in rows]
+
+
+def explain_notice_request(db_session, payload):
+    """
+    Returns {statement name: (plan lines, [problems])} for one payload.
+    """
+    request = NoticeFilterRequest(**payload)
+    query = build_notice_query(db_session, request)
+    rowid = literal_column("notices.rowid")
+    facet_cols = []
+    for _, db_col, label_col in notice_facet_fields(request.sector):
+        facet_cols.append(db_col)
+        if label_col is not None:
+            facet_cols.append(label_col)
+
+    offset = (request.page - 1) * request.page_size
+    statements = {
+        "materialize": query.with_entities(rowid, NoticeModel.PublishDateInt, *facet_cols).statement,
+        "page": query.order_by(NoticeModel.PublishDateInt.desc(), rowid.desc())
+            .offset(offset).limit(request.page_size).statement,
+        "keyset": query.filter(
+                NoticeModel.PublishDateInt.isnot(None),
+                tuple_(NoticeModel.PublishDateInt, rowid) < tuple_(99991231235959, 0)
+            ).order_by(NoticeModel.PublishDateInt.desc(), rowid.desc()).limit(request.page_size).statement,
+    }
+
+    report = {}
+    for name, statement in statements.items():
+        plan = explain_plan(db_session, statement)
+        problems = sorted({
+            label for detail in plan for label, test in PROBLEM_MARKERS.items()
+            if test(detail) and "notices_fts" not in detail
+        })
+        report[name] = (plan, problems)
+    return report
+
+
+def run_index_advisor(db_session, payloads=None):
+    """
+    Print plans for every payload and a summary of flagged statements.
+    Returns the number of flagged statements.
+    """
+    payloads = payloads or SAMPLE_NOTICE_REQUESTS
+    flagged = []
+    for payload in payloads:
+        print(f"\n=== {json.dumps(payload, ensure_ascii=False)}")
+        for name, (plan, problems) in explain_notice_request(db_session, payload).items():
+            marker = f"  <-- {', '.join(problems)}" if problems else ""
+            print(f"  [{name}]{marker}")
+            for detail in plan:
+                print(f"      {detail}")
+            if problems:
+                flagged.append((payload, name, problems))
+
+    print(f"\n--- {len(flagged)} flagged statement(s) ---")
+    for payload, name, problems in flagged:
+        print(f"{', '.join(problems):<20} {name:<12} {json.dumps(payload, ensure_ascii=False)}")
+    return len(flagged)
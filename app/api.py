@@ -3,11 +3,11 @@ from fastapi.responses import RedirectResponse
 from typing import List, Optional, Dict
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
-from sqlalchemy import or_,func
+from sqlalchemy import or_,func, select, case, literal_column
 import json
 
 from app.models import (
-    Company,IPORank,IPOData,IPOReview,
+    Company,IPORank,IPOData,IPOReview,Notice,News,
     NoticeListResponse, EventListResponse, NewsListResponse,
     NoticeFilterRequest, SectorInformation, CompanyBaseItem,
     IPODataBasic, IPOListResponse,
@@ -18,12 +18,30 @@ from app.models import (
     GlobalSearchResponse, GlobalSearchRequest
 )
 from app.db import (
-    get_db, 
+    get_db, get_write_db, bump_favorites_version, ReadSessionLocal,
     CompanyModel, NoticeModel, EventModel, NewsModel, 
     IPODataModel, IPORankModel, TimelineDetailModel, IPOReviewModel, SectorInfoModel,
     FavoriteNoticeModel
 )
-from app.database import db
+from app.database import db, parse_timeline
+from app.notice_query import build_notice_query, notice_facet_fields, decode_facet_values, sector_condition
+from app.facets import NoticeResultSet
+from app.rollups import NoticeRollup
+from app.fts import (
+    NOTICE_SEARCH_WEIGHTS, fts_searchable, has_notice_search_fts,
+    join_notice_search, notice_search_rowids, notice_search_score
+)
+from app.counting import (
+    COUNT_CAP, resolve_count_strategy, display_total, capped_count, estimate_count, estimate_notice_count
+)
+from app.executor import configure_thread_pool, route_limit
+from app.pagination import keyset_page, offset_page, rowid_of
+from app.dates import date_param, date_range_conditions
+from app.cache import FAVORITE_ROUTES, result_cache, cached_response
+from app.serialization import json_response
+from app.projection import model_fields, resolve_fields, projection
+from app.autocomplete import company_index
+from app.columnar import notice_columns
 import uuid
 import datetime
 
@@ -32,6 +50,25 @@ async def lifespan(app: FastAPI):
     # Data loading is handled via 'manage.py load' command.
     # Server startup assumes database is already populated.
     print("Lifespan: Server started. Ensuring database connection...")
+    # Sync route handlers run in this bounded thread pool, off the event loop
+    configure_thread_pool()
+    # Build the company autocomplete index now rather than on the first search
+    db_session = ReadSessionLocal()
+    try:
+        company_index.refresh(db_session)
+    except Exception as e:
+        print(f"Company autocomplete index not built yet: {e}")
+    finally:
+        db_session.close()
+    # NOTICE_FACET_ENGINE=columnar: build the notice snapshot before serving
+    if notice_columns.enabled:
+        db_session = ReadSessionLocal()
+        try:
+            notice_columns.build(db_session)
+        except Exception as e:
+            print(f"Notice columnar snapshot not built yet: {e}")
+        finally:
+            db_session.close()
     # Optional: Check if DB has tables/data? 
     # For now, just yield.
     yield
@@ -39,35 +76,32 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(title="Jianwei Data API", lifespan=lifespan)
 
+# Default column sets for list endpoints: what each response model reads
+NOTICE_FIELDS = model_fields(Notice, NoticeModel)
+IPO_DATA_FIELDS = model_fields(IPODataBasic, IPODataModel)
+IPO_RANK_FIELDS = model_fields(IPORankBasic, IPORankModel)
+IPO_REVIEW_FIELDS = model_fields(IPOReviewBasic, IPOReviewModel)
+NEWS_FIELDS = model_fields(News, NewsModel)
+
 # --- Companies ---
 
 @app.get("/companies/search", response_model=List[CompanyBaseItem])
-async def search_companies(
+def search_companies(
     keyword: str = Query(..., min_length=1),
     limit: int = Query(6, ge=1, le=20),
     db_session: Session = Depends(get_db)
 ):
     """
-    Search companies by stockCode or Ticker (fuzzy match).
+    Search companies by stockCode, Ticker or Ticker pinyin initials (fuzzy
+    match), exact and prefix matches first.
     Only includes companies with Market < 7.
     """
-    keyword_lower = f"%{keyword}%"
-    
-    # SQLAlchemy filter
-    query = db_session.query(CompanyModel).filter(
-        CompanyModel.Market < 7,
-        or_(
-            CompanyModel.stockCode.ilike(keyword_lower),
-            CompanyModel.Ticker.ilike(keyword_lower)
-        )
-    ).limit(limit)
-    
+    company_index.refresh(db_session)
+
     results = []
-    for c in query.all():
-        stock_code = c.stockCode or ""
-        ticker = c.Ticker or ""
+    for company_id, stock_code, ticker in company_index.search(keyword, limit):
         results.append(CompanyBaseItem(
-            id=str(c.id),
+            id=company_id,
             label=f"[{stock_code} {ticker}]",
             stockCode=stock_code,
             ticker=ticker
@@ -76,7 +110,7 @@ async def search_companies(
     return results
 
 @app.get("/companies/{company_id}", response_model=Company)
-async def get_company_by_id(company_id: str, db_session: Session = Depends(get_db)):
+def get_company_by_id(company_id: str, db_session: Session = Depends(get_db)):
     """
     Get A-share company details by ID.
     """
@@ -87,9 +121,10 @@ async def get_company_by_id(company_id: str, db_session: Session = Depends(get_d
     return company
 
 @app.get("/companies/boards/top", response_model=Dict[str, List[CompanyBaseItem]])
-async def get_top_companies_by_board(db_session: Session = Depends(get_db)):
+@cached_response("boards_top", Dict[str, List[CompanyBaseItem]])
+def get_top_companies_by_board(db_session: Session = Depends(get_db)):
     """
-    Get top 100 companies for each A-share board.
+    Get top 100 companies for each A-share board, earliest listed first.
     Boards: 沪市主板(1), 深市主板(2), 深市中小板(3), 深市创业板(4), 科创板(5)
     """
     boards = {
@@ -101,74 +136,40 @@ async def get_top_companies_by_board(db_session: Session = Depends(get_db)):
     }
     
     result = {name: [] for name in boards.values()}
-    
-    for market_code, board_name in boards.items():
-        companies = db_session.query(CompanyModel).filter(
-            CompanyModel.Market == market_code
-        ).limit(100).all()
-        
-        for c in companies:
-            code = c.stockCode or ""
-            ticker = c.Ticker or ""
-
-            result[board_name].append(CompanyBaseItem(
-                id=str(c.id),
-                label=f"{code} {ticker}".strip(),
-                stockCode=code,
-                ticker=ticker
-            ))
+
+    # One pass over all boards: rank within each Market, keep the first 100
+    rank = func.row_number().over(
+        partition_by=CompanyModel.Market,
+        order_by=(CompanyModel.listDate.is_(None), CompanyModel.listDate, CompanyModel.stockCode, rowid_of(CompanyModel))
+    ).label("rank")
+    ranked = select(
+        CompanyModel.id, CompanyModel.Market, CompanyModel.stockCode, CompanyModel.Ticker, rank
+    ).where(CompanyModel.Market.in_(list(boards))).subquery()
+    rows = db_session.execute(
+        select(ranked.c.id, ranked.c.Market, ranked.c.stockCode, ranked.c.Ticker)
+        .where(ranked.c.rank <= 100)
+        .order_by(ranked.c.Market, ranked.c.rank)
+    ).all()
+
+    for c in rows:
+        code = c.stockCode or ""
+        ticker = c.Ticker or ""
+
+        result[boards[c.Market]].append({
+            "id": str(c.id),
+            "label": f"{code} {ticker}".strip(),
+            "stockCode": code,
+            "ticker": ticker
+        })
                 
     return result
 
 # --- Notices ---
 
-SECTOR_FIELD_CONFIG = {
-    "三市公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "新三板公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "港股中文": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}],
-    "港股英文": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}],
-    "美股": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}],
-    "法规库": [{"name": "法规类型", "field": "StockCode"}, {"name": "地域分布", "field": "Province"}, {"name": "发布机构", "field": "Institutions"}],
-    "债券公告": [{"name": "债券名称", "field": "StockCode"}, {"name": "发行人", "field": "Publisher"}, {"name": "市场类型", "field": "MarketType"}, {"name": "债券品种", "field": "Category"}, {"name": "公告类型", "field": "NoticeType"}],
-    "投行业务审核进程": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "公募基金公告": [{"name": "匹配基金", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "基金管理人", "field": "Publisher"}],
-    "科创板公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "辅导信息": [{"name": "公告类型", "field": "NoticeType"}, {"name": "监管机构", "field": "StockCode"}],
-    "投资者互动问答": [{"name": "发布主体", "field": "StockCode"}, {"name": "是否回复", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "政府采购招标": [{"name": "公告类型", "field": "NoticeType"}, {"name": "项目类型", "field": "Category"}, {"name": "招标机构", "field": "StockCode"}, {"name": "地域分布", "field": "Province"}],
-    "招股书比对": [{"name": "发布主体", "field": "StockCode"}],
-    "创业板审核公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "北交所公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}],
-    "证券行业监管信息": [{"name": "数据来源", "field": "Source"}, {"name": "监管机构", "field": "StockCode"}, {"name": "监管措施", "field": "Category"}],
-    "科创板反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
-    "上市公司函件问答": [{"name": "发布主体", "field": "StockCode"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}],
-    "综合反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}],
-    "创业板反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
-    "债券反馈问答": [{"name": "发布主体", "field": "StockCode"}],
-    "北交所反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
-    "主板反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
-    "微信搜索": [{"name": "公告类型", "field": "NoticeType"}],
-    "再融资": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
-    "并购重组": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}]
-}
-
-# Map Config Field -> (Request Field Name, DB Column)
-FIELD_MAPPING = {
-    "StockCode": ("stock_code", NoticeModel.StockCode),
-    "NoticeType": ("notice_type", NoticeModel.NoticeType),
-    "Industry": ("industry", NoticeModel.Industry),
-    "MarketType": ("market_type", NoticeModel.MarketType),
-    "Province": ("province", NoticeModel.Province),
-    "Category": ("category", NoticeModel.Category),
-    "Publisher": ("publisher", NoticeModel.Publisher),
-    "Institutions": ("institutions", NoticeModel.Institutions),
-    "Source": ("source", NoticeModel.Source),
-    "IntermediaryType": ("intermediary_type", NoticeModel.IntermediaryType),
-    "IntermediaryName": ("intermediary_name", NoticeModel.IntermediaryName),
-}
-
-@app.post("/notices", response_model=NoticeListResponse)
-async def get_notices(
+@app.post("/notices", response_model=NoticeListResponse, response_model_exclude_unset=True,
+          dependencies=[Depends(route_limit("notices"))])
+@cached_response("notices", NoticeListResponse, exclude_unset=True)
+def get_notices(
     request: NoticeFilterRequest, 
     page: Optional[int] = Query(None, ge=1, description="Page number (overrides body)"),
     page_size: Optional[int] = Query(None, ge=1, le=100, description="Page size (overrides body)"),
@@ -178,167 +179,91 @@ async def get_notices(
     current_page = page if page is not None else request.page
     current_page_size = page_size if page_size is not None else request.page_size
 
-    # Build query
-    query = db_session.query(NoticeModel)
-    
-    # 1. Sector Filter (Mandatory)
-    query = query.filter(NoticeModel.sector == request.sector)
-    
-    # 2. Dynamic Field Filtering based on Sector Config
-    valid_fields = SECTOR_FIELD_CONFIG.get(request.sector, [])
-    
-    for field_config in valid_fields:
-        config_field_name = field_config["field"]
-        
-        if config_field_name in FIELD_MAPPING:
-            req_field, db_col = FIELD_MAPPING[config_field_name]
-            
-            # Get values from request
-            # Include filter
-            include_vals = getattr(request, req_field, None)
-            if include_vals:
-                if config_field_name == "markettype":
-                    # MarketType stored as string in DB, ensure string comparison
-                    query = query.filter(db_col.in_([str(m) for m in include_vals]))
-                else:
-                    query = query.filter(db_col.in_(include_vals))
-            
-            # Exclude filter
-            exclude_field = f"{req_field}_exclude"
-            exclude_vals = getattr(request, exclude_field, None)
-            if exclude_vals:
-                if config_field_name == "markettype":
-                    query = query.filter(db_col.notin_([str(m) for m in exclude_vals]))
-                else:
-                    query = query.filter(db_col.notin_(exclude_vals))
-        
-    # 3. Date Range (Global)
-    if request.start_date and request.end_date:
-        query = query.filter(
-            NoticeModel.PublishDate >= request.start_date,
-            NoticeModel.PublishDate <= request.end_date
-        )
-              
-    def apply_keyword_filter(q, col, search_text, match_mode):
-        if not search_text:
-            return q
-        
-        keywords = search_text.split()
-        if not keywords:
-            return q
-            
-        if match_mode == "all":
-            for k in keywords:
-                q = q.filter(col.ilike(f"%{k}%"))
-        elif match_mode == "any":
-            conditions = [col.ilike(f"%{k}%") for k in keywords]
-            q = q.filter(or_(*conditions))
-        elif match_mode == "none":
-            for k in keywords:
-                q = q.filter(~col.ilike(f"%{k}%"))
-            
-        return q
-
-    # 4. Title Search (Global)
-    if request.title_search_all:
-        query = apply_keyword_filter(query, NoticeModel.Title, request.title_search_all, "all")
-    if request.title_search_any:
-        query = apply_keyword_filter(query, NoticeModel.Title, request.title_search_any, "any")
-    if request.title_search_none:
-        query = apply_keyword_filter(query, NoticeModel.Title, request.title_search_none, "none")
-        
-    # 5. Content Search (Preview) (Global)
-    if request.content_search_all:
-        query = apply_keyword_filter(query, NoticeModel.Preview, request.content_search_all, "all")
-    if request.content_search_any:
-        query = apply_keyword_filter(query, NoticeModel.Preview, request.content_search_any, "any")
-    if request.content_search_none:
-        query = apply_keyword_filter(query, NoticeModel.Preview, request.content_search_none, "none")
-        
-    # 6. AQ Search (List of strings) - Applied to Preview
-    # aq_search_all: Each string in the list must be present in Preview
-    if request.aq_search_all:
-        for term in request.aq_search_all:
-            if term:
-                query = query.filter(NoticeModel.Preview.ilike(f"%{term}%"))
-                
-    # aq_search_any: At least one string in the list must be present in Preview
-    if request.aq_search_any:
-        conditions = [NoticeModel.Preview.ilike(f"%{term}%") for term in request.aq_search_any if term]
-        if conditions:
-            query = query.filter(or_(*conditions))
-            
-    # aq_search_none: None of the strings in the list should be present in Preview
-    if request.aq_search_none:
-        for term in request.aq_search_none:
-            if term:
-                query = query.filter(~NoticeModel.Preview.ilike(f"%{term}%"))
+    query = build_notice_query(db_session, request)
+    facet_fields = notice_facet_fields(request.sector)
+    # Page rows carry only the requested columns
+    entity = projection(NoticeModel, resolve_fields(request.fields, NOTICE_FIELDS, ("id", "PublishDate")))
+    page_query = query.with_entities(entity)
+
+    carried = [f[1] for f in facet_fields] + [f[2] for f in facet_fields if f[2] is not None]
+    
+    # With NOTICE_FACET_ENGINE=columnar, requests without keyword filters are
+    # answered from the in-memory snapshot. Sector + date range only: counts come
+    # from the precomputed rollups (exact and cheap). Otherwise evaluate the
+    # filters once; count, page and facets all read the materialized set. A
+    # capped/estimated count strategy changes only how `total` is reported: the
+    # facets and publish_entity_count always describe every matching row
+    count_strategy = "exact"
+    result_set = notice_columns.for_request(db_session, request)
+    if result_set is None:
+        result_set = NoticeRollup.for_request(db_session, request, query)
+    if result_set is None:
+        count_strategy = resolve_count_strategy(db_session, request.count_strategy, query)
+        result_set = NoticeResultSet(db_session, query, carried)
+    with result_set:
+        has_entity = any(f[2] is not None for f in facet_fields)
+        total, publish_entity_count = result_set.summary("StockCode" if has_entity else None)
+        exact = count_strategy == "exact" or total <= COUNT_CAP
+        if not exact:
+            if count_strategy == "capped":
+                total = COUNT_CAP
+            else:
+                total, exact = estimate_notice_count(db_session, request, query)
+        
+        # Pagination (sorted by PublishDateInt desc); a cursor reads the page straight from the index
+        offset = (current_page - 1) * current_page_size
+        if request.after:
+            notices, next_cursor = keyset_page(
+                page_query, NoticeModel, NoticeModel.PublishDateInt, request.after, current_page_size
+            )
+        else:
+            notices, next_cursor = result_set.page(offset, current_page_size, entity)
         
-    # Total count (slow on large dataset, maybe optimize later)
-    total = query.count()
-    
-    # Sort
-    query = query.order_by(NoticeModel.PublishDate.desc())
-    
-    # Pagination
-    notices = query.offset((current_page - 1) * current_page_size).limit(current_page_size).all()
+        # 7. Facets Implementation (Dynamic)
+        facet_rows = result_set.facets([
+            (facet_key, db_col.key, label_col.key if label_col is not None else None)
+            for facet_key, db_col, label_col in facet_fields
+        ])
+        facet_rows = decode_facet_values(db_session, facet_rows, facet_fields)
     
-    # 6. Facets Implementation (Dynamic)
     facets = {}
-    
-    for field_config in valid_fields:
-        config_field_name = field_config["field"]
-        
-        if config_field_name not in FIELD_MAPPING:
-            continue
-            
-        _, db_col = FIELD_MAPPING[config_field_name]
+    for facet_key, db_col, label_col in facet_fields:
+        results = facet_rows[facet_key]
         
         # Special handling for StockCode (Code + Ticker)
-        if config_field_name == "StockCode":
-            # 1. Count distinct entities
-            publish_entity_count = query.with_entities(NoticeModel.StockCode).distinct().count()
+        if label_col is not None:
             facets["publish_entity_count"] = publish_entity_count
-            config_field_name = "publish_entity" if request.sector != "辅导信息" else "StockCode"
-            
-            # 2. Top entities
-            agg_query = query.with_entities(
-                 NoticeModel.StockCode, 
-                 func.max(NoticeModel.StockTicker), 
-                 func.count(NoticeModel.StockCode)
-             ).group_by(NoticeModel.StockCode).order_by(func.count(NoticeModel.StockCode).desc()).limit(50)
-             
-            results = agg_query.all()
-            facets[config_field_name] = [
-                 {"name": f"{r[0]} {r[1] if r[1] else ''}".strip(), "count": r[2], "StockCode": r[0]} 
-                 for r in results if r[0] is not None
+            facets[facet_key] = [
+                 {"name": f"{value} {label if label else ''}".strip(), "count": count, "StockCode": value} 
+                 for value, label, count in results
             ]
         else:
-            # Standard aggregation
-            agg_query = query.with_entities(db_col, func.count(db_col)).group_by(db_col).order_by(func.count(db_col).desc()).limit(50)
-            
-            results = agg_query.all()
-            
-            facets[config_field_name] = [
-                {"name": str(r[0]), "count": r[1]} 
-                for r in results if r[0] is not None
+            facets[facet_key] = [
+                {"name": str(value), "count": count} 
+                for value, _, count in results
             ]
     
     return {
         "total": total,
-        "data": notices,
-        "facets": facets
+        "total_display": display_total(total, count_strategy, exact),
+        "count_strategy": count_strategy,
+        # Dicts: validating a Row from attributes pays for a failed lookup per unprojected field
+        "data": [n._asdict() for n in notices],
+        "facets": facets,
+        "next_cursor": next_cursor
     }
 
-@app.post("/notices/search", response_model=GlobalSearchResponse)
-async def global_search_notices(
+@app.post("/notices/search", response_model=GlobalSearchResponse, dependencies=[Depends(route_limit("notices_search"))])
+@cached_response("notices_search", GlobalSearchResponse)
+def global_search_notices(
     request: GlobalSearchRequest,
     db_session: Session = Depends(get_db)
 ):
     """
     Global search for notices across all sectors.
     Returns top {limit} results for each sector where keyword matches.
-    Matches against: Title, StockCode, StockTicker, NoticeType, Publisher
+    Matches against: Title, StockCode, StockTicker, NoticeType, MarketType,
+    Province, Preview; order_by="relevance" ranks by weighted bm25.
     """
     keyword_like = f"%{request.keyword}%"
     
@@ -349,24 +274,26 @@ async def global_search_notices(
         filters.append(NoticeModel.StockCode == request.stock_code)
         
     if request.start_date and request.end_date:
-        filters.append(NoticeModel.PublishDate >= request.start_date)
-        filters.append(NoticeModel.PublishDate <= request.end_date)
+        filters.append(NoticeModel.PublishDateInt >= date_param(request.start_date))
+        filters.append(NoticeModel.PublishDateInt <= date_param(request.end_date, end=True))
     
-    filters.append(NoticeModel.sector == request.sector)
+    filters.append(sector_condition(request.sector))
     
     # 1. Get all sectors that have matches
     # We want to search across multiple columns.
     # Condition: Title LIKE %k% OR StockCode LIKE %k% OR ...
     
-    search_condition = or_(
-        NoticeModel.Title.ilike(keyword_like),
-        NoticeModel.StockCode.ilike(keyword_like),
-        NoticeModel.StockTicker.ilike(keyword_like),
-        NoticeModel.NoticeType.ilike(keyword_like),
-        NoticeModel.MarketType.ilike(keyword_like),
-        NoticeModel.Province.ilike(keyword_like),
-        NoticeModel.Preview.ilike(keyword_like)
-    )
+    # The full-text index answers the same substring match when the keyword is
+    # long enough for its trigrams
+    use_fts = has_notice_search_fts(db_session) and fts_searchable(request.keyword)
+    if use_fts:
+        search_condition = literal_column("notices.rowid").in_(
+            notice_search_rowids(request.keyword, request.stock_code)
+        )
+    else:
+        search_condition = or_(*[
+            getattr(NoticeModel, name).ilike(keyword_like) for name in NOTICE_SEARCH_WEIGHTS
+        ])
     
     # Combine all filters
     full_condition = search_condition
@@ -375,104 +302,134 @@ async def global_search_notices(
     
     # Query builder
     query = db_session.query(NoticeModel).filter(full_condition)
+    # Result dicts hold only the requested Notice columns
+    required = ("id", "PublishDate", "StockCode", "StockTicker") if request.order_by == "company" else ("id", "PublishDate")
+    columns = resolve_fields(request.fields, NOTICE_FIELDS, required)
+    entity = projection(NoticeModel, columns)
     
     # Results container
     final_results = []
     total_count = 0
+    next_cursor = None
     
     if request.order_by == "company":
-        # Aggregate by company (StockCode)
-        # Optimized approach: 
-        # 1. Calculate total companies matching criteria
-        # 2. Query distinct companies for current page (sorted by latest notice)
-        # 3. Fetch full details only for those companies
-        
-        # 1. Total Count (Distinct StockCode + StockTicker)
-        # Note: func.count(func.distinct(NoticeModel.StockCode)) can be slow on large datasets in SQLite
-        # but it's necessary for correct pagination metadata.
-        # We need to count distinct pairs (StockCode, StockTicker). 
-        # SQLite doesn't support COUNT(DISTINCT col1, col2). 
-        # Workaround: Count distinct concatenation or use subquery.
-        # Using subquery for better compatibility
-        count_sub_q = db_session.query(
-            NoticeModel.StockCode, NoticeModel.StockTicker
-        ).filter(full_condition).group_by(NoticeModel.StockCode, NoticeModel.StockTicker).subquery()
-        
-        total_count = db_session.query(func.count()).select_from(count_sub_q).scalar()
-        
-        # 2. Get StockCodes for current page
-        # Group by StockCode + StockTicker to find the latest date for each company
-        sub_q = db_session.query(
-            NoticeModel.StockCode,
-            NoticeModel.StockTicker,
-            func.max(NoticeModel.PublishDate).label('max_date')
-        ).filter(
-            full_condition
-        ).group_by(
-            NoticeModel.StockCode,
-            NoticeModel.StockTicker
-        ).order_by(
-            func.max(NoticeModel.PublishDate).desc()
-        ).offset(
-            (request.page - 1) * request.limit
-        ).limit(
-            request.limit
-        )
-        
-        paged_companies = sub_q.all() # List of (StockCode, StockTicker, max_date)
-        
+        if request.after:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not supported for order_by='company'")
+
+        # Aggregate by company (StockCode + StockTicker) in one query:
+        # 1. matched: rowid and company keys of every match (one index pass);
+        #    notices without a StockCode or StockTicker belong to no company
+        # 2. companies: one row per company with its match count, numbered by
+        #    latest match; count(*) OVER () counts the companies
+        # 3. picked: the page's companies joined back to their matches,
+        #    numbered newest first, cut at per_company_limit
+        # Notice columns are read only for the picked rows
+        rowid = literal_column("notices.rowid")
+        company_keys = (NoticeModel.StockCode.isnot(None), NoticeModel.StockTicker.isnot(None))
+        matched = select(
+            rowid.label("notice_rowid"), NoticeModel.StockCode, NoticeModel.StockTicker, NoticeModel.PublishDateInt
+        ).where(full_condition, *company_keys).cte("matched")
+        companies = select(
+            matched.c.StockCode, matched.c.StockTicker,
+            func.count().label("company_count"),
+            func.row_number().over(
+                order_by=(func.max(matched.c.PublishDateInt).desc(), matched.c.StockCode, matched.c.StockTicker)
+            ).label("company_rank"),
+            func.count().over().label("companies"),
+        ).group_by(matched.c.StockCode, matched.c.StockTicker).cte("companies")
+
+        offset = (request.page - 1) * request.limit
+        numbered = select(
+            matched.c.notice_rowid, companies.c.company_rank, companies.c.company_count, companies.c.companies,
+            func.row_number().over(
+                partition_by=companies.c.company_rank,
+                order_by=(matched.c.PublishDateInt.desc(), matched.c.notice_rowid.desc())
+            ).label("company_row"),
+        ).select_from(companies).join(
+            matched,
+            (matched.c.StockCode == companies.c.StockCode) & (matched.c.StockTicker == companies.c.StockTicker)
+        ).where(
+            companies.c.company_rank > offset,
+            companies.c.company_rank <= offset + request.limit,
+        ).subquery()
+        picked = select(numbered).where(numbered.c.company_row <= request.per_company_limit).subquery()
+
+        rows = db_session.execute(
+            select(
+                *[getattr(NoticeModel, name) for name in columns],
+                picked.c.company_row, picked.c.company_count, picked.c.companies
+            ).select_from(picked).join(NoticeModel, rowid == picked.c.notice_rowid)
+            .order_by(picked.c.company_rank, picked.c.company_row)
+        ).mappings().all()
+
+        # Ranking every company already counts them all, so the total is exact
+        count_strategy, exact = "exact", True
+        if rows:
+            total_count = rows[0]["companies"]
+        else:
+            # Past the last page: count the companies on their own
+            total_count = db_session.query(func.count()).select_from(
+                select(NoticeModel.StockCode, NoticeModel.StockTicker).where(full_condition, *company_keys)
+                .group_by(NoticeModel.StockCode, NoticeModel.StockTicker).subquery()
+            ).scalar()
+
         final_results = []
-        
-        if paged_companies:
-            # We need to fetch details for these specific (StockCode, StockTicker) pairs.
-            # Building a tuple IN clause is not standard in all SQL dialects, but SQLAlchemy supports tuple_
-            from sqlalchemy import tuple_
-            
-            target_pairs = [(r.StockCode, r.StockTicker) for r in paged_companies]
-            
-            details = db_session.query(NoticeModel).filter(
-                full_condition,
-                tuple_(NoticeModel.StockCode, NoticeModel.StockTicker).in_(target_pairs)
-            ).order_by(NoticeModel.PublishDate.desc()).all()
-            
-            # Group in memory
-            # Initialize map with order from paged_companies
-            # Key must be (StockCode, StockTicker)
-            grouped_map = {(code, ticker): {"StockCode": code, "StockTicker": ticker, "count": 0, "data": []} 
-                           for code, ticker, _ in paged_companies}
-            
-            for item in details:
-                key = (item.StockCode, item.StockTicker)
-                if key in grouped_map:
-                    grouped_map[key]["count"] += 1
-                    # Convert to dict
-                    d = {k: v for k, v in item.__dict__.items() if not k.startswith('_')}
-                    grouped_map[key]["data"].append(d)
-            
-            # Reconstruct list in correct order
-            for code, ticker, _ in paged_companies:
-                key = (code, ticker)
-                if key in grouped_map:
-                    final_results.append(grouped_map[key])
+        for row in rows:
+            if row["company_row"] == 1:
+                final_results.append({
+                    "StockCode": row["StockCode"], "StockTicker": row["StockTicker"],
+                    "count": row["company_count"], "data": []
+                })
+            final_results[-1]["data"].append({name: row[name] for name in columns})
         
     else:
-        if request.order_by == "asc":
-            query = query.order_by(NoticeModel.PublishDate.asc())
-        else: # desc
-            query = query.order_by(NoticeModel.PublishDate.desc())
+        descending = request.order_by != "asc"
+        if request.order_by == "relevance" and request.after:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not supported for order_by='relevance'")
             
-        total_count = query.count()
-        items = query.offset((request.page - 1) * request.limit).limit(request.limit).all()
+        count_strategy = resolve_count_strategy(db_session, request.count_strategy, query)
+        if count_strategy == "exact":
+            total_count, exact = query.count(), True
+        elif count_strategy == "capped":
+            total_count, exact = capped_count(query)
+        else:
+            base_query = db_session.query(NoticeModel).filter(*filters)
+            total_count, exact = estimate_count(query, base_query)
+        if request.order_by == "relevance":
+            # Best matches first, newest first among equals
+            offset = (request.page - 1) * request.limit
+            if use_fts:
+                ranked = join_notice_search(
+                    db_session.query(entity).select_from(NoticeModel), request.keyword, request.stock_code
+                ).filter(*filters).order_by(notice_search_score())
+            else:
+                # No index for this keyword: score by which weighted columns contain it
+                score = sum(
+                    case((getattr(NoticeModel, name).ilike(keyword_like), weight), else_=0)
+                    for name, weight in NOTICE_SEARCH_WEIGHTS.items()
+                )
+                ranked = query.with_entities(entity).order_by(score.desc())
+            items = ranked.order_by(
+                NoticeModel.PublishDateInt.desc(), literal_column("notices.rowid").desc()
+            ).offset(offset).limit(request.limit).all()
+        elif request.after:
+            items, next_cursor = keyset_page(
+                query.with_entities(entity), NoticeModel, NoticeModel.PublishDateInt, request.after, request.limit, descending
+            )
+        else:
+            items, next_cursor = offset_page(
+                query.with_entities(entity), NoticeModel, NoticeModel.PublishDateInt, (request.page - 1) * request.limit, request.limit, descending
+            )
         
-        # Convert SQLAlchemy objects to dicts
-        for item in items:
-            d = {k: v for k, v in item.__dict__.items() if not k.startswith('_')}
-            final_results.append(d)
+        final_results = [item._asdict() for item in items]
     
-    return GlobalSearchResponse(total=total_count, data=final_results)
+    return GlobalSearchResponse(
+        total=total_count, total_display=display_total(total_count, count_strategy, exact),
+        count_strategy=count_strategy, data=final_results, next_cursor=next_cursor
+    )
 
 @app.post("/notices/favorite", response_model=FavoriteNoticeResponse)
-async def toggle_favorite_notices(request: FavoriteNoticeRequest, db_session: Session = Depends(get_db)):
+def toggle_favorite_notices(request: FavoriteNoticeRequest, db_session: Session = Depends(get_write_db)):
     """
     Toggle favorite status for multiple notices. 
     If a notice is favorite, remove it. If not, add it.
@@ -533,12 +490,16 @@ async def toggle_favorite_notices(request: FavoriteNoticeRequest, db_session: Se
             })
     
     db_session.commit()
+    # IsFav is part of cached notice responses; nothing else depends on it
+    bump_favorites_version(db_session)
+    result_cache.invalidate(FAVORITE_ROUTES)
     
     return {"results": results}
 
 # --- Events ---
 @app.get("/events/top", response_model=EventListResponse)
-async def get_top_events(
+@json_response("events_top", EventListResponse)
+def get_top_events(
     market_type: str = Query("全部", description="Market type: A股, 港股, 美股, 全部"),
     limit: int = Query(100, ge=1, le=100),
     db_session: Session = Depends(get_db)
@@ -563,11 +524,13 @@ async def get_top_events(
     }
 
 @app.get("/events", response_model=EventListResponse)
-async def get_events(
+@json_response("events", EventListResponse)
+def get_events(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     event_id: Optional[str] = None,
     keyword: Optional[str] = Query(None, description="Fuzzy search by event title"),
+    after: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (overrides page)"),
     db_session: Session = Depends(get_db)
 ):
     query = db_session.query(EventModel)
@@ -579,20 +542,26 @@ async def get_events(
         query = query.filter(EventModel.title.ilike(f"%{keyword}%"))
         
     total = query.count()
-    events = query.offset((page - 1) * page_size).limit(page_size).all()
+    if after:
+        events, next_cursor = keyset_page(query, EventModel, None, after, page_size, descending=False)
+    else:
+        events, next_cursor = offset_page(query, EventModel, None, (page - 1) * page_size, page_size, descending=False)
     
     return {
         "total": total,
-        "data": events
+        "data": events,
+        "next_cursor": next_cursor
     }
 
 # --- News ---
 @app.get("/news", response_model=NewsListResponse)
-async def get_news(
+@json_response("news", NewsListResponse)
+def get_news(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     event_id: Optional[str] = None,
     keyword: Optional[str] = Query(None, description="Fuzzy search by news title"),
+    after: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (overrides page)"),
     db_session: Session = Depends(get_db)
 ):
     query = db_session.query(NewsModel)
@@ -604,67 +573,77 @@ async def get_news(
         query = query.filter(NewsModel.title.ilike(f"%{keyword}%"))
         
     total = query.count()
-    news = query.offset((page - 1) * page_size).limit(page_size).all()
+    if after:
+        news, next_cursor = keyset_page(query, NewsModel, None, after, page_size, descending=False)
+    else:
+        news, next_cursor = offset_page(query, NewsModel, None, (page - 1) * page_size, page_size, descending=False)
     
     return {
         "total": total,
-        "data": news
+        "data": news,
+        "next_cursor": next_cursor
     }
 
 # --- IPO Data ---
 
-@app.get("/ipo/list", response_model=IPOListResponse)
-async def get_ipo_list(
+@app.get("/ipo/list", response_model=IPOListResponse, response_model_exclude_unset=True)
+@cached_response("ipo_list", IPOListResponse, exclude_unset=True)
+def get_ipo_list(
     category: str = Query("首次公开发行", description="Category filter"),
+    status: Optional[List[str]] = Query(None, description="Status filter"),
+    listing_market: Optional[List[str]] = Query(None, description="Listing Market filter"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (overrides page)"),
+    fields: Optional[List[str]] = Query(None, description="Columns to return (default: all of IPODataBasic)"),
+    start_date: Optional[str] = Query(None, description="LatestDate from (inclusive)"),
+    end_date: Optional[str] = Query(None, description="LatestDate to (inclusive)"),
     db_session: Session = Depends(get_db)
 ):
     query = db_session.query(IPODataModel).filter(IPODataModel.category == category)
+    query = query.filter(*date_range_conditions(IPODataModel.LatestDateInt, start_date, end_date))
+    if status:
+        query = query.filter(IPODataModel.Status.in_(status))
+    if listing_market:
+        query = query.filter(IPODataModel.ListingMarket.in_(listing_market))
     total = query.count()
-    
-    items = query.all()
-    
-    # Map to basic model
+
+    # timeline_json is parsed at load time; databases loaded before it existed
+    # fall back to the raw column
+    entity = projection(IPODataModel, resolve_fields(fields, IPO_DATA_FIELDS), {
+        "timeline": func.coalesce(IPODataModel.timeline_json, IPODataModel.timeline)
+    })
+    query = query.with_entities(entity)
+    if after:
+        items, next_cursor = keyset_page(query, IPODataModel, None, after, page_size, descending=False)
+    else:
+        items, next_cursor = offset_page(query, IPODataModel, None, (page - 1) * page_size, page_size, descending=False)
+
     result_data = []
     for item in items:
-        tl = item.timeline
-        if isinstance(tl, str):
-            try:
-                tl = json.loads(tl)
-            except:
-                # If parsing fails, try to clean potential formatting issues or just return empty list
-                # Some CSVs might have single quotes instead of double quotes
-                try:
-                    tl = json.loads(tl.replace("'", '"'))
-                except:
-                    tl = []
-        
-        # Ensure it's a list (if None or other type)
-        if tl is None:
-            tl = []
-                
-        result_data.append(IPODataBasic(
-            id=str(item.id),
-            Issuer=item.Issuer,
-            ListingMarket=item.ListingMarket,
-            LatestDate=item.LatestDate,
-            Status=item.Status,
-            timeline=tl
-        ))
-        
+        values = item._asdict()
+        values["id"] = str(item.id)
+        if "timeline" in values:
+            values["timeline"] = parse_timeline(values["timeline"])
+        result_data.append(values)
+
     return {
         "total": total,
-        "data": result_data
+        "data": result_data,
+        "next_cursor": next_cursor
     }
 
 @app.get("/ipo/{ipo_id}", response_model=IPOData)
-async def get_ipo_detail(ipo_id: str, db_session: Session = Depends(get_db)):
+def get_ipo_detail(ipo_id: str, db_session: Session = Depends(get_db)):
     item = db_session.query(IPODataModel).filter(IPODataModel.id == ipo_id).first()
     
     if not item:
         raise HTTPException(status_code=404, detail="IPO data not found")
         
     # Handle JSON fields
-    if isinstance(item.timeline, str):
+    if item.timeline_json is not None:
+        item.timeline = json.loads(item.timeline_json)
+    elif isinstance(item.timeline, str):
         try:
             item.timeline = json.loads(item.timeline)
         except:
@@ -673,46 +652,44 @@ async def get_ipo_detail(ipo_id: str, db_session: Session = Depends(get_db)):
     return item
 
 # --- IPO Rank ---
-@app.get("/ipo/rank/list", response_model=IPORankListResponse)
-async def get_ipo_rank_list(
+@app.get("/ipo/rank/list", response_model=IPORankListResponse, response_model_exclude_unset=True)
+@json_response("ipo_rank_list", IPORankListResponse, exclude_unset=True)
+def get_ipo_rank_list(
     category: str = Query("首次公开发行", description="Category filter"),
     listing_market: Optional[str] = Query(None, description="Listing Market filter"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (overrides page)"),
+    fields: Optional[List[str]] = Query(None, description="Columns to return (default: all of IPORankBasic)"),
+    start_date: Optional[str] = Query(None, description="AcceptDate from (inclusive)"),
+    end_date: Optional[str] = Query(None, description="AcceptDate to (inclusive)"),
     db_session: Session = Depends(get_db)
 ):
     query = db_session.query(IPORankModel).filter(IPORankModel.category == category)
+    query = query.filter(*date_range_conditions(IPORankModel.AcceptDateInt, start_date, end_date))
     
     if listing_market:
         query = query.filter(IPORankModel.ListingMarket == listing_market)
         
     total = query.count()
-    items = query.offset((page - 1) * page_size).limit(page_size).all()
+    query = query.with_entities(projection(IPORankModel, resolve_fields(fields, IPO_RANK_FIELDS)))
+    if after:
+        items, next_cursor = keyset_page(query, IPORankModel, None, after, page_size, descending=False)
+    else:
+        items, next_cursor = offset_page(query, IPORankModel, None, (page - 1) * page_size, page_size, descending=False)
     
     result_data = []
     for item in items:
-        result_data.append(IPORankBasic(
-            id=str(item.id),
-            Rank=item.Rank,
-            ListingMarket=item.ListingMarket,
-            Entity=item.Entity,
-            Sponsor=item.Sponsor,
-            AccountingFirm=item.AccountingFirm,
-            LawFirm=item.LawFirm,
-            AcceptDate=item.AcceptDate,
-            CurrentStatuses=item.CurrentStatuses,
-            LastUpdateDate=item.LastUpdateDate,
-            Reviewers=item.Reviewers,
-            RelatedDocuments=item.RelatedDocuments
-        ))
+        result_data.append(IPORankBasic(**{**item._asdict(), "id": str(item.id)}))
         
     return {
         "total": total,
-        "data": result_data
+        "data": result_data,
+        "next_cursor": next_cursor
     }
 
 @app.get("/ipo/rank/{rank_id}", response_model=IPORank)
-async def get_ipo_rank_detail(rank_id: str, db_session: Session = Depends(get_db)):
+def get_ipo_rank_detail(rank_id: str, db_session: Session = Depends(get_db)):
     item = db_session.query(IPORankModel).filter(IPORankModel.id == rank_id).first()
     
     if not item:
@@ -722,8 +699,9 @@ async def get_ipo_rank_detail(rank_id: str, db_session: Session = Depends(get_db
 
 # --- Timeline Details ---
 
-@app.get("/timeline/details", response_model=TimelineDetailListResponse)
-async def get_timeline_details(
+@app.get("/timeline/details", response_model=TimelineDetailListResponse, dependencies=[Depends(route_limit("timeline"))])
+@cached_response("timeline", TimelineDetailListResponse)
+def get_timeline_details(
     stock_code: str = Query("000001", description="Stock Code to filter timeline details"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -734,6 +712,7 @@ async def get_timeline_details(
     category_name_exclude: Optional[List[str]] = Query(None, description="Exclude by category_name"),
     start_date: Optional[str] = Query(None, description="Start date (inclusive)"),
     end_date: Optional[str] = Query(None, description="End date (inclusive)"),
+    after: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (overrides page)"),
     db_session: Session = Depends(get_db)
 ):
     query = db_session.query(TimelineDetailModel).filter(TimelineDetailModel.stockCode == stock_code)
@@ -742,8 +721,8 @@ async def get_timeline_details(
     # Date Range
     if start_date and end_date:
         query = query.filter(
-            TimelineDetailModel.publishDate >= start_date,
-            TimelineDetailModel.publishDate <= end_date
+            TimelineDetailModel.publishDateInt >= date_param(start_date),
+            TimelineDetailModel.publishDateInt <= date_param(end_date, end=True)
         )
     
     # Category Filter
@@ -779,7 +758,13 @@ async def get_timeline_details(
         query = apply_keyword_filter(query, TimelineDetailModel.title, title_search_none, "none")
     
     total = query.count()
-    items = query.offset((page - 1) * page_size).limit(page_size).all()
+    # Newest first
+    if after:
+        items, next_cursor = keyset_page(query, TimelineDetailModel, TimelineDetailModel.publishDateInt, after, page_size)
+    else:
+        items, next_cursor = offset_page(
+            query, TimelineDetailModel, TimelineDetailModel.publishDateInt, (page - 1) * page_size, page_size
+        )
     
     # Facets: category_name counts
     # We need to compute counts for all categories based on the current filter (excluding category_name filter itself? usually facets respect other filters)
@@ -795,41 +780,44 @@ async def get_timeline_details(
     return {
         "total": total,
         "data": items,
-        "facets": {"category_name": category_facets}
+        "facets": {"category_name": category_facets},
+        "next_cursor": next_cursor
     }
 
 # --- IPO Review ---
 
-@app.get("/ipo/review/list", response_model=IPOReviewListResponse)
-async def get_ipo_review_list(
+@app.get("/ipo/review/list", response_model=IPOReviewListResponse, response_model_exclude_unset=True)
+@json_response("ipo_review_list", IPOReviewListResponse, exclude_unset=True)
+def get_ipo_review_list(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (overrides page)"),
+    fields: Optional[List[str]] = Query(None, description="Columns to return (default: all of IPOReviewBasic)"),
+    start_date: Optional[str] = Query(None, description="LastUpdateDate from (inclusive)"),
+    end_date: Optional[str] = Query(None, description="LastUpdateDate to (inclusive)"),
     db_session: Session = Depends(get_db)
 ):
     query = db_session.query(IPOReviewModel)
+    query = query.filter(*date_range_conditions(IPOReviewModel.LastUpdateDateInt, start_date, end_date))
     total = query.count()
-    items = query.offset((page - 1) * page_size).limit(page_size).all()
+    query = query.with_entities(projection(IPOReviewModel, resolve_fields(fields, IPO_REVIEW_FIELDS)))
+    if after:
+        items, next_cursor = keyset_page(query, IPOReviewModel, None, after, page_size, descending=False)
+    else:
+        items, next_cursor = offset_page(query, IPOReviewModel, None, (page - 1) * page_size, page_size, descending=False)
     
     result_data = []
     for item in items:
-        result_data.append(IPOReviewBasic(
-            id=str(item.id),
-            Rank=item.Rank,
-            Entity=item.Entity,
-            CurrentStatuses=item.CurrentStatuses,
-            LastUpdateDate=item.LastUpdateDate,
-            ReviewStatus=item.ReviewStatus,
-            Reviewers=item.Reviewers,
-            ReviewQuestions=item.ReviewQuestions
-        ))
+        result_data.append(IPOReviewBasic(**{**item._asdict(), "id": str(item.id)}))
         
     return {
         "total": total,
-        "data": result_data
+        "data": result_data,
+        "next_cursor": next_cursor
     }
 
 @app.get("/ipo/review/{review_id}", response_model=IPOReview)
-async def get_ipo_review_detail(review_id: str, db_session: Session = Depends(get_db)):
+def get_ipo_review_detail(review_id: str, db_session: Session = Depends(get_db)):
     item = db_session.query(IPOReviewModel).filter(IPOReviewModel.id == review_id).first()
     
     if not item:
@@ -838,38 +826,70 @@ async def get_ipo_review_detail(review_id: str, db_session: Session = Depends(ge
     return item
 
 @app.get("/sector/information", response_model=List[SectorInformation])
-async def get_sector_information(sector: str = Query(..., description="The sector name"), db_session: Session = Depends(get_db)):
+@cached_response("sector_information", List[SectorInformation])
+def get_sector_information(
+    sector: str = Query(..., description="The sector name"),
+    news_limit: Optional[int] = Query(None, ge=1, description="Newest news items per source (default: all)"),
+    db_session: Session = Depends(get_db)
+):
     """
-    Get information for a specific sector.
+    Get information for a specific sector: its sources, each with its news
+    newest first, read in one query.
     """
-    # 1. Get Sector Info
-    sector_info_items = db_session.query(SectorInfoModel).filter(SectorInfoModel.Sector == sector).all()
-    
-    if not sector_info_items:
+    news_rowid = rowid_of(NewsModel)
+    news_order = (NewsModel.timeInt.desc(), news_rowid.desc())
+    source_ids = select(SectorInfoModel.id).where(SectorInfoModel.Sector == sector)
+    columns = [getattr(NewsModel, name) for name in NEWS_FIELDS]
+    if news_limit:
+        rank = func.row_number().over(partition_by=NewsModel.inforId, order_by=news_order)
+        news = select(*columns, rank.label("rank")).where(NewsModel.inforId.in_(source_ids)).subquery()
+        on = (news.c.inforId == SectorInfoModel.id) & (news.c.rank <= news_limit)
+        order = [news.c.rank]
+    else:
+        news = select(*columns, NewsModel.timeInt, news_rowid.label("news_rowid")).where(NewsModel.inforId.in_(source_ids)).subquery()
+        on = news.c.inforId == SectorInfoModel.id
+        order = [news.c.timeInt.desc(), news.c.news_rowid.desc()]
+
+    rows = db_session.execute(
+        select(SectorInfoModel.id, SectorInfoModel.SourceName, SectorInfoModel.SourceUrl,
+               *[news.c[name].label(f"news_{name}") for name in NEWS_FIELDS])
+        .outerjoin(news, on)
+        .where(SectorInfoModel.Sector == sector)
+        .order_by(rowid_of(SectorInfoModel), *order)
+    ).all()
+
+    if not rows:
         return []
-        
+
     # Reconstruct the nested structure
-    result_list = []
-    
-    for item in sector_info_items:
-        # Get News for this item
-        news = db_session.query(NewsModel).filter(NewsModel.inforId == item.id).all()
-        
-        # Convert to dict and add news
-        item_dict = {
-            "id": item.id,
-            "Sector": item.Sector,
-            "SourceName": item.SourceName,
-            "SourceUrl": item.SourceUrl,
-            "news": news # Pydantic model will handle serialization if names match
-        }
-        result_list.append(item_dict)
-        
+    sources = {}
+    for row in rows:
+        source = sources.get(row.id)
+        if source is None:
+            source = sources[row.id] = {
+                "id": row.id,
+                "SourceName": row.SourceName,
+                "SourceUrl": row.SourceUrl,
+                "news": []
+            }
+        # No news for this source: the outer join fills the news columns with NULL
+        if row.news_id is not None:
+            source["news"].append({name: row[3 + k] for k, name in enumerate(NEWS_FIELDS)})
+
     return [{
         "sector": sector,
-        "information": result_list
+        "information": list(sources.values())
     }]
 
+# --- Cache ---
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """
+    Response cache counters (entries, bytes, hits, misses, hit rate).
+    """
+    return result_cache.stats()
+
 @app.get("/")
 async def root():
     return RedirectResponse(url="/docs")
@@ -0,0 +1,142 @@
+"""
+In-memory company autocomplete for GET /companies/search.
+
+The searchable companies (Market < 7) are held in process: every stock code,
+ticker and ticker pinyin initials string (平安银行 -> "payh", needs the optional
+pypinyin package) is indexed by its characters and character bigrams. A
+keyword's candidates are the intersection of its grams' posting sets, checked
+with a substring test, so a lookup touches only companies sharing the
+keyword's rarest gram instead of scanning the table. Codes, tickers and
+initials are also kept in sorted arrays, so exact and prefix matches are binary
+searches and the substring lookup is skipped once they fill the page. Matches
+rank exact code or ticker first, then prefixes, then pinyin initials, then
+other substrings.
+
+The index is built on first use (and at startup) and rebuilt when the
+database's data_version changes, checked at most every
+DATA_VERSION_CHECK_INTERVAL seconds like the response cache.
+"""
+import bisect
+import threading
+import time
+
+from app.cache import DATA_VERSION_CHECK_INTERVAL
+from app.db import CompanyModel, read_data_version
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # optional dependency
+    lazy_pinyin = None
+
+# Match kinds, best first
+EXACT, PREFIX, PINYIN_EXACT, PINYIN_PREFIX, SUBSTRING, PINYIN_SUBSTRING = range(6)
+
+
+def pinyin_initials(text):
+    if lazy_pinyin is None or not text:
+        return ""
+    # Non-Chinese characters (the "A" in 万科A) are kept as they are
+    return "".join(lazy_pinyin(text, style=Style.FIRST_LETTER, errors="default")).lower()
+
+
+def grams(text):
+    """Characters and character bigrams of `text`."""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class CompanyIndex:
+    def __init__(self):
+        self.companies = []  # (id, stockCode, Ticker)
+        self._keys = []  # per company: (code, ticker, initials), lowercased
+        self._postings = {}  # gram -> set of company positions
+        self._sorted = ([], [], [])  # per key field: sorted (text, position)
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.built = False
+
+    def build(self, db_session):
+        rows = db_session.query(CompanyModel.id, CompanyModel.stockCode, CompanyModel.Ticker).filter(
+            CompanyModel.Market < 7
+        ).order_by(CompanyModel.stockCode).all()
+        companies, keys, postings = [], [], {}
+        for position, (company_id, stock_code, ticker) in enumerate(rows):
+            companies.append((str(company_id), stock_code or "", ticker or ""))
+            key = ((stock_code or "").lower(), (ticker or "").lower(), pinyin_initials(ticker))
+            keys.append(key)
+            for gram in grams(key[0]) | grams(key[1]) | grams(key[2]):
+                postings.setdefault(gram, set()).add(position)
+        sorted_keys = tuple(
+            sorted((key[field], position) for position, key in enumerate(keys) if key[field])
+            for field in range(3)
+        )
+        # Swap in the finished index; searches running meanwhile use the old one
+        self.companies, self._keys, self._postings, self._sorted = companies, keys, postings, sorted_keys
+        self.built = True
+        print(f"Company autocomplete index: {len(companies)} companies, {len(postings)} grams")
+
+    def refresh(self, db_session):
+        """
+        Build the index if it was never built, or rebuild it if data_version
+        changed since it was built.
+        """
+        now = time.monotonic()
+        if self.built and now - self._version_checked_at < DATA_VERSION_CHECK_INTERVAL:
+            return
+        version = read_data_version(db_session)
+        with self._lock:
+            self._version_checked_at = now
+            if self.built and version == self._version:
+                return
+            self.build(db_session)
+            self._version = version
+
+    def _prefixed(self, field, keyword):
+        """Positions whose `field` (0 code, 1 ticker, 2 initials) starts with keyword."""
+        entries = self._sorted[field]
+        start = bisect.bisect_left(entries, (keyword,))
+        end = bisect.bisect_left(entries, (keyword + "\uffff",))
+        return entries[start:end]
+
+    def search(self, keyword, limit):
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return []
+        keys = self._keys
+        ranked = {}  # position -> (kind, length)
+
+        def add(position, kind, length):
+            if position not in ranked or ranked[position] > (kind, length):
+                ranked[position] = (kind, length)
+
+        # Exact and prefix matches are ranges of the sorted code/ticker arrays
+        for field in (0, 1):
+            for text, position in self._prefixed(field, keyword):
+                add(position, EXACT if text == keyword else PREFIX, len(text))
+        if len(ranked) < limit:
+            for text, position in self._prefixed(2, keyword):
+                add(position, PINYIN_EXACT if text == keyword else PINYIN_PREFIX, len(text))
+
+        if len(ranked) < limit:
+            # Substrings: every bigram (or the single character) must occur in a match
+            postings = self._postings
+            query_grams = grams(keyword) if len(keyword) == 1 else {keyword[i:i + 2] for i in range(len(keyword) - 1)}
+            sets = sorted((postings.get(gram, ()) for gram in query_grams), key=len)
+            candidates = set(sets[0]).intersection(*sets[1:]) if sets and sets[0] else ()
+            for position in candidates:
+                if position in ranked:
+                    continue
+                code, ticker, initials = keys[position]
+                if keyword in code:
+                    add(position, SUBSTRING, len(code))
+                elif keyword in ticker:
+                    add(position, SUBSTRING, len(ticker))
+                elif keyword in initials:
+                    add(position, PINYIN_SUBSTRING, len(initials))
+
+        # Shorter matches (closer to the keyword) first, then stockCode order
+        best = sorted((rank + (position,) for position, rank in ranked.items()))[:limit]
+        return [self.companies[position] for _, _, position in best]
+
+
+company_index = CompanyIndex()
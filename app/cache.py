@@ -0,0 +1,196 @@
+"""
+Response cache for the heavy read routes (POST /notices, POST /notices/search,
+GET /timeline/details, GET /ipo/list, GET /sector/information,
+GET /companies/boards/top).
+
+Entries are the serialized JSON bodies, keyed on the route name plus the
+canonicalized request (lists of filter values are order-insensitive), evicted
+LRU-first under an entry count and a byte cap, and expired after a TTL. The
+cache also tracks the database's data_version (app_meta table): the loader
+bumps it, and a changed version drops the whole cache. Favorite toggles bump
+favorites_version instead, which drops only the routes in FAVORITE_ROUTES.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.db import read_data_version, read_favorites_version
+from app.serialization import response_serializer
+
+RESULT_CACHE_ENTRIES = int(os.environ.get("RESULT_CACHE_ENTRIES", "2048"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "600"))  # seconds
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+# How often (seconds) the data_version row is re-read; a loader in another
+# process is noticed within this interval
+DATA_VERSION_CHECK_INTERVAL = float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", "1"))
+
+# Routes whose responses carry notices.IsFav
+FAVORITE_ROUTES = ("notices", "notices_search")
+
+
+def _canonical(value):
+    if isinstance(value, BaseModel):
+        return _canonical(value.model_dump())
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_canonical(v) for v in value]
+        # Filter value lists are sets: ["a", "b"] and ["b", "a"] are one entry
+        if all(isinstance(v, (str, int, float)) for v in items):
+            items = sorted(items, key=lambda v: (type(v).__name__, v))
+        return items
+    return value
+
+
+class ResultCache:
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, ttl=RESULT_CACHE_TTL, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (body, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._favorites_version = None
+        self._version_checked_at = 0.0
+        # Bumped on every clear, so results computed before it are not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def make_key(self, name, params):
+        return name + ":" + json.dumps(_canonical(params), sort_keys=True, ensure_ascii=False, default=str)
+
+    def sync_version(self, db_session):
+        """
+        Re-read data_version and favorites_version at most every
+        DATA_VERSION_CHECK_INTERVAL seconds. A changed data_version drops every
+        entry, a changed favorites_version the FAVORITE_ROUTES entries.
+        """
+        now = time.monotonic()
+        if now - self._version_checked_at < DATA_VERSION_CHECK_INTERVAL:
+            return
+        version = read_data_version(db_session)
+        favorites_version = read_favorites_version(db_session)
+        with self._lock:
+            self._version_checked_at = now
+            if version != self._version:
+                self._clear()
+            elif favorites_version != self._favorites_version:
+                self._clear(FAVORITE_ROUTES)
+            self._version = version
+            self._favorites_version = favorites_version
+
+    def invalidate(self, routes=None):
+        """
+        Drop the entries of `routes` (default: everything) now and re-read the
+        versions on the next request (called after this process bumped one).
+        """
+        with self._lock:
+            self._clear(routes)
+            self._version_checked_at = 0.0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, body, generation):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, time.monotonic() + self.ttl)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "data_version": self._version,
+                "favorites_version": self._favorites_version,
+            }
+
+    def _remove(self, key):
+        body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def _clear(self, routes=None):
+        if routes is None:
+            self._entries.clear()
+            self._bytes = 0
+        else:
+            for key in [k for k in self._entries if k.split(":", 1)[0] in routes]:
+                self._remove(key)
+        # Results computed before the clear may be stale: do not store them
+        self.generation += 1
+
+
+result_cache = ResultCache()
+
+
+def cached_response(name, response_model, exclude_unset=False):
+    """
+    Route decorator: serve the JSON body from result_cache when the same
+    request was answered under the current data_version, otherwise run the
+    route, serialize its result (app.serialization, fast path or Pydantic) and
+    cache it. The route's `db_session` argument is used to read data_version.
+    """
+    serialize = response_serializer(name, response_model, exclude_unset)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not result_cache.enabled:
+                return Response(content=serialize(func(*args, **kwargs)), media_type="application/json")
+
+            db_session = kwargs.get("db_session")
+            result_cache.sync_version(db_session)
+            key = result_cache.make_key(
+                name, {k: v for k, v in kwargs.items() if not isinstance(v, Session)}
+            )
+            generation = result_cache.generation
+            body = result_cache.get(key)
+            if body is None:
+                result = func(*args, **kwargs)
+                body = serialize(result)
+                result_cache.put(key, body, generation)
+            return Response(content=body, media_type="application/json")
+        return wrapper
+    return decorator
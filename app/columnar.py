@@ -0,0 +1,249 @@
+"""
+Optional in-process columnar snapshot of the notice filter and facet columns
+for POST /notices, enabled with NOTICE_FACET_ENGINE=columnar.
+
+The snapshot keeps one NumPy array per column: rowid, PublishDateInt, the
+dictionary codes (app/dictionary.py) and, for the text filter columns
+(StockCode, Publisher, ...), codes assigned when the snapshot is built. Code 0
+is NULL. Rows are sorted by (sectorId, PublishDateInt desc, rowid desc), so a
+sector is a contiguous slice already in page order. A request without keyword
+filters is answered from it: sector, IN/exclude and date filters are boolean
+masks over the sector's slice, every facet is one np.bincount, and only the
+page of rows is read from SQLite, by rowid.
+
+The snapshot is built at startup and rebuilt in a background thread when the
+database's data_version changes (checked at most every
+DATA_VERSION_CHECK_INTERVAL seconds like the response cache); until the new
+one is ready, requests use the SQL engine.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import literal_column, text
+
+from app.cache import DATA_VERSION_CHECK_INTERVAL
+from app.dates import date_param
+from app.db import NoticeModel, ReadSessionLocal, read_data_version
+from app.dictionary import DICTIONARY_COLUMNS, DICTIONARY_TABLE
+from app.facets import FACET_LIMIT
+from app.notice_query import CODE_COLUMNS, FIELD_MAPPING, SECTOR_FIELD_CONFIG
+from app.pagination import encode_cursor
+
+NOTICE_FACET_ENGINE = os.environ.get("NOTICE_FACET_ENGINE", "sql")
+
+# Filters the snapshot cannot evaluate: requests using them go to SQLite
+KEYWORD_FILTERS = [
+    "title_search_all", "title_search_any", "title_search_none",
+    "content_search_all", "content_search_any", "content_search_none",
+    "aq_search_all", "aq_search_any", "aq_search_none",
+]
+
+# Text filter/facet columns (and the StockCode facet label), coded at build time
+TEXT_COLUMNS = ["StockCode", "StockTicker", "Publisher", "Institutions", "IntermediaryName"]
+
+# PublishDateInt of NULL dates: after every date in descending order, outside every range
+NO_DATE = -1
+
+
+class NoticeSnapshot:
+    def __init__(self, db_session):
+        """
+        Read the columns of every notice, and the data_version they belong to,
+        in one read transaction.
+        """
+        self.version = read_data_version(db_session)
+        code_columns = list(DICTIONARY_COLUMNS.values())
+        selected = ", ".join(f'"{c}"' for c in ["PublishDateInt"] + code_columns + TEXT_COLUMNS)
+        frame = pd.read_sql_query(text(f"SELECT rowid AS rid, {selected} FROM notices"), db_session.connection())
+
+        rowids = frame["rid"].to_numpy(np.int64)
+        dates = frame["PublishDateInt"].fillna(NO_DATE).to_numpy(np.int64)
+        columns = {c: frame[c].fillna(0).to_numpy(np.int32) for c in code_columns}
+        self.values = {}  # text column -> values by code - 1
+        self.text_codes = {}  # text column -> {value: code}
+        for c in TEXT_COLUMNS:
+            # Sorted, so code order is value order (max() of codes is max() of values)
+            codes, uniques = pd.factorize(frame[c], sort=True)
+            columns[c] = (codes + 1).astype(np.int32)
+            self.values[c] = np.asarray(uniques, dtype=object)
+            self.text_codes[c] = {value: code for code, value in enumerate(self.values[c], 1)}
+
+        order = np.lexsort((-rowids, -dates, columns["sectorId"]))
+        self.rowids = rowids[order]
+        self.dates = dates[order]
+        self.columns = {c: values[order] for c, values in columns.items()}
+
+        # sectorId -> (start, end) of its slice
+        sector_ids, starts, counts = np.unique(self.columns["sectorId"], return_index=True, return_counts=True)
+        slices = {int(s): (int(a), int(a + n)) for s, a, n in zip(sector_ids, starts, counts)}
+        self.dictionary = {}  # dictionary field -> {value: code}
+        for field, code, value in db_session.execute(text(f"SELECT field, code, value FROM {DICTIONARY_TABLE}")):
+            self.dictionary.setdefault(field, {})[value] = code
+        self.sectors = {
+            value: slices[code] for value, code in self.dictionary.get("sector", {}).items() if code in slices
+        }
+
+    @property
+    def nbytes(self):
+        return self.rowids.nbytes + self.dates.nbytes + sum(c.nbytes for c in self.columns.values())
+
+    def codes(self, column, values):
+        """Codes of the `values` of `column` that occur; unknown values are dropped."""
+        field = CODE_COLUMNS.get(column)
+        lookup = self.dictionary.get(field, {}) if field else self.text_codes[column]
+        return [lookup[v] for v in values if v in lookup]
+
+    def value(self, column, code):
+        """Facet value for a code: dictionary codes are decoded later, like SQL facets."""
+        if column in CODE_COLUMNS:
+            return int(code)
+        return self.values[column][code - 1]
+
+
+class ColumnarResultSet:
+    """
+    Same summary()/facets()/page() interface as app.facets.NoticeResultSet,
+    answered from a NoticeSnapshot.
+    """
+
+    def __init__(self, snapshot, db_session, request):
+        self.snapshot = snapshot
+        self.db_session = db_session
+        start, end = snapshot.sectors.get(request.sector, (0, 0))
+        mask = np.ones(end - start, dtype=bool)
+
+        # The filters build_notice_query() applies, as masks
+        for field_config in SECTOR_FIELD_CONFIG.get(request.sector, []):
+            if field_config["field"] not in FIELD_MAPPING:
+                continue
+            req_field, db_col = FIELD_MAPPING[field_config["field"]]
+            column = snapshot.columns[db_col.key][start:end]
+            include_vals = getattr(request, req_field, None)
+            if include_vals:
+                mask &= np.isin(column, snapshot.codes(db_col.key, include_vals))
+            exclude_vals = getattr(request, f"{req_field}_exclude", None)
+            if exclude_vals:
+                # Like NOT IN, never matches NULL
+                mask &= (column != 0) & ~np.isin(column, snapshot.codes(db_col.key, exclude_vals))
+        if request.start_date and request.end_date:
+            dates = snapshot.dates[start:end]
+            mask &= (dates >= date_param(request.start_date)) & (dates <= date_param(request.end_date, end=True))
+
+        # Positions of the matching rows, in page order
+        self.positions = np.flatnonzero(mask) + start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def summary(self, distinct_key=None):
+        total = len(self.positions)
+        if distinct_key is None:
+            return total, None
+        counts = np.bincount(self.snapshot.columns[distinct_key][self.positions], minlength=1)
+        # Like SELECT DISTINCT, NULL (code 0) counts as one value
+        return total, int(np.count_nonzero(counts[1:])) + int(counts[0] > 0)
+
+    def facets(self, fields, limit=FACET_LIMIT):
+        result = {}
+        for facet_key, col_key, label_key in fields:
+            codes = self.snapshot.columns[col_key][self.positions]
+            counts = np.bincount(codes, minlength=1)
+            counts[0] = 0  # NULL is not a facet value
+            # Ties last value first, the order SQLite's ORDER BY ... LIMIT gives them
+            top = len(counts) - 1 - np.argsort(-counts[::-1], kind="stable")[:limit]
+            top = top[counts[top] > 0]
+            labels = {}
+            if label_key is not None and len(top):
+                # max(label) per value; label codes sort like the labels
+                best = np.zeros(len(counts), dtype=np.int32)
+                np.maximum.at(best, codes, self.snapshot.columns[label_key][self.positions])
+                labels = {code: self.snapshot.value(label_key, best[code]) for code in top if best[code]}
+            result[facet_key] = [
+                (self.snapshot.value(col_key, code), labels.get(code), int(counts[code])) for code in top
+            ]
+        return result
+
+    def page(self, offset, limit, entity=NoticeModel):
+        picked = self.positions[offset:offset + limit]
+        if not len(picked):
+            return [], None
+        rids = self.snapshot.rowids[picked].tolist()
+        rowid = literal_column("notices.rowid")
+        rows = self.db_session.query(entity, rowid).filter(rowid.in_(rids)).all()
+        by_rid = {rid: notice for notice, rid in rows}
+        next_cursor = None
+        if len(picked) == limit:
+            last_date = int(self.snapshot.dates[picked[-1]])
+            next_cursor = encode_cursor([None if last_date == NO_DATE else last_date, rids[-1]])
+        return [by_rid[rid] for rid in rids if rid in by_rid], next_cursor
+
+
+class NoticeColumnStore:
+    def __init__(self):
+        self.snapshot = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._version_checked_at = 0.0
+
+    @property
+    def enabled(self):
+        return NOTICE_FACET_ENGINE == "columnar"
+
+    def build(self, db_session):
+        start = time.perf_counter()
+        snapshot = NoticeSnapshot(db_session)
+        self.snapshot = snapshot
+        print(f"Notice columnar snapshot: {len(snapshot.rowids)} notices, "
+              f"{snapshot.nbytes / 1024 / 1024:.1f} MiB, built in {time.perf_counter() - start:.1f}s")
+
+    def _build_in_background(self):
+        db_session = ReadSessionLocal()
+        try:
+            self.build(db_session)
+        except Exception as e:
+            print(f"Notice columnar snapshot not built: {e}")
+        finally:
+            db_session.close()
+            self._building = False
+
+    def current(self, db_session):
+        """
+        The snapshot when it matches the database's data_version, otherwise
+        None (a rebuild is started in the background).
+        """
+        now = time.monotonic()
+        if now - self._version_checked_at < DATA_VERSION_CHECK_INTERVAL:
+            return self.snapshot
+        version = read_data_version(db_session)
+        with self._lock:
+            self._version_checked_at = now
+            if self.snapshot is not None and self.snapshot.version == version:
+                return self.snapshot
+            self.snapshot = None
+            if not self._building:
+                self._building = True
+                threading.Thread(target=self._build_in_background, daemon=True).start()
+        return None
+
+    def for_request(self, db_session, request):
+        """
+        A ColumnarResultSet when the engine is enabled, the snapshot is current
+        and the request has only filters it can evaluate, otherwise None.
+        """
+        if not self.enabled or request.count_strategy not in (None, "exact"):
+            return None
+        if any(getattr(request, name, None) for name in KEYWORD_FILTERS):
+            return None
+        snapshot = self.current(db_session)
+        if snapshot is None:
+            return None
+        return ColumnarResultSet(snapshot, db_session, request)
+
+
+notice_columns = NoticeColumnStore()
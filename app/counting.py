@@ -0,0 +1,101 @@
+"""
+Bounded and approximate counting for POST /notices and POST /notices/search.
+
+A request's count_strategy picks how `total` is computed:
+  exact      COUNT(*) over the whole result (the old behaviour)
+  capped     stop after COUNT_CAP matches; total_display reads "10000+"
+  estimated  sector/date base count (rollups or index) scaled by the match rate
+             of a COUNT_SAMPLE_SIZE sample of the newest base rows; "~N"
+Without one, the server counts exactly unless EXPLAIN QUERY PLAN shows the count
+would visit every row of notices or of the whole sector, and caps it then.
+"""
+import os
+import re
+
+from sqlalchemy import func, literal_column, select
+
+from app.advisor import PROBLEM_MARKERS, explain_plan
+from app.db import NoticeModel
+from app.models import NoticeFilterRequest
+from app.notice_query import build_notice_query
+from app.rollups import NoticeRollup
+
+COUNT_CAP = int(os.environ.get("COUNT_CAP", "10000"))
+COUNT_SAMPLE_SIZE = int(os.environ.get("COUNT_SAMPLE_SIZE", "2000"))
+
+# Row lookups for every notice of a sector: the index only narrows by sector
+_SECTOR_SCAN = re.compile(r"^SEARCH notices USING INDEX \S+ \(sectorId=\?\)$")
+
+
+def count_needs_scan(db_session, query):
+    """
+    True if counting `query` reads every notice, or every notice of the sector
+    with a table lookup each (residual filters the index cannot answer).
+    """
+    plan = explain_plan(db_session, query.with_entities(func.count()).statement)
+    for detail in plan:
+        if "notices_fts" in detail:
+            continue
+        if PROBLEM_MARKERS["full scan"](detail) and detail.startswith("SCAN notices"):
+            return True
+        if _SECTOR_SCAN.match(detail):
+            return True
+    return False
+
+
+def resolve_count_strategy(db_session, requested, query):
+    if requested:
+        return requested
+    return "capped" if count_needs_scan(db_session, query) else "exact"
+
+
+def display_total(total, strategy, exact):
+    if exact:
+        return str(total)
+    if strategy == "capped":
+        return f"{total}+"
+    return f"~{total}"
+
+
+def capped_count(query, cap=COUNT_CAP):
+    """
+    Returns (count, exact): at most `cap`, exact False when more rows match.
+    """
+    # SQLite drops the subquery columns count(*) does not read
+    limited = query.limit(cap + 1).subquery()
+    n = query.session.execute(select(func.count()).select_from(limited)).scalar()
+    return min(n, cap), n <= cap
+
+
+def estimate_count(query, base_query, base_total=None, sample_size=COUNT_SAMPLE_SIZE):
+    """
+    Estimate the row count of `query`, which is `base_query` plus more filters.
+    base_total (the count of base_query) is computed when not given.
+    Returns (count, exact); exact when the sample covered the whole base.
+    """
+    rowid = literal_column("notices.rowid")
+    sample = base_query.with_entities(rowid.label("rid")).order_by(
+        NoticeModel.PublishDateInt.desc(), rowid.desc()
+    ).limit(sample_size).subquery()
+    session = query.session
+    sampled = session.execute(select(func.count()).select_from(sample)).scalar()
+    matches = query.filter(rowid.in_(select(sample.c.rid))).count()
+    if sampled < sample_size:
+        return matches, True
+    if base_total is None:
+        base_total = base_query.count()
+    return round(base_total * matches / sampled), False
+
+
+def estimate_notice_count(db_session, request, query):
+    """
+    estimate_count() for a NoticeFilterRequest, with the sector + date range
+    request as the base (counted from the rollups when they are built).
+    """
+    base_request = NoticeFilterRequest(
+        sector=request.sector, start_date=request.start_date, end_date=request.end_date
+    )
+    base_query = build_notice_query(db_session, base_request)
+    rollup = NoticeRollup.for_request(db_session, base_request, base_query)
+    base_total = rollup.summary()[0] if rollup is not None else None
+    return estimate_count(query, base_query, base_total)
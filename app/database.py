@@ -2,12 +2,23 @@ import pandas as pd
 import os
 import json
 import glob
+import time
 import uuid
+import hashlib
+import datetime
 from app.db import (
-    SessionLocal, init_db, 
-    CompanyModel, EventModel, NewsModel, SectorInfoModel,
+    SessionLocal, bump_data_version, LoadManifestModel,
+    CompanyModel, NoticeModel, EventModel, NewsModel, SectorInfoModel,
     IPODataModel, IPORankModel, TimelineDetailModel, IPOReviewModel
 )
+from app.dates import add_date_ints
+from app.dictionary import sync_notice_codes
+from app.fts import build_notice_fts, drop_notice_fts_triggers, install_notice_fts_triggers
+from app.rollups import build_notice_rollups, drop_notice_rollups, has_notice_rollups
+from app.notice_ingest import (
+    iter_notice_chunks, upsert_notices_method, backfill_notice_natural_keys,
+    bulk_load_notice_files, parallel_load_notice_files
+)
 
 # File paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -25,16 +36,89 @@ FILE_PATHS = {
     "IPOReviewModel": os.path.join(DATA_DIR, "ipo_review.csv")
 }
 
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def source_fingerprint(session, directory, path):
+    """
+    Compare a source file with its load_manifest entry.
+    Returns (changed, fingerprint). Size and mtime are checked first; the file
+    is only hashed when they differ (or it was never loaded), so a touched but
+    identical file is still reported as unchanged.
+    """
+    stat = os.stat(path)
+    fingerprint = {
+        "path": os.path.relpath(path, directory),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": None,
+    }
+    entry = session.get(LoadManifestModel, fingerprint["path"])
+    if entry is not None and entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+        fingerprint["sha256"] = entry.sha256
+        return False, fingerprint
+    fingerprint["sha256"] = file_sha256(path)
+    changed = entry is None or entry.sha256 != fingerprint["sha256"]
+    return changed, fingerprint
+
+def record_source(session, fingerprint, rows=None):
+    entry = session.get(LoadManifestModel, fingerprint["path"])
+    if entry is None:
+        entry = LoadManifestModel(path=fingerprint["path"])
+        session.add(entry)
+    entry.size = fingerprint["size"]
+    entry.mtime = fingerprint["mtime"]
+    entry.sha256 = fingerprint["sha256"]
+    # rows is None when an unchanged file only had its mtime refreshed
+    if rows is not None:
+        entry.rows = rows
+        entry.loaded_at = datetime.datetime.now().isoformat()
+    session.commit()
+
+def load_timeline(raw):
+    """
+    IPO timeline from its CSV text: JSON, or Python-literal style with single
+    quotes. A missing timeline is []; raises ValueError when unparsable.
+    """
+    if not isinstance(raw, str):
+        # None, or NaN from pandas for an empty cell
+        return [] if raw is None or raw != raw else raw
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        # Some CSVs have single quotes instead of double quotes
+        value = json.loads(raw.replace("'", '"'))
+    return [] if value is None else value
+
+def parse_timeline(raw):
+    try:
+        return load_timeline(raw)
+    except ValueError:
+        return []
+
 class Database:
     def __init__(self):
+        # The schema is migrated by `manage.py load`/`migrate` (app.db.init_db()),
+        # on the file being written only, never as a side effect of importing
         self.loaded = False
-        init_db()
 
-    def load_from_directory(self, directory: str, model_name: str = None):
+    def load_from_directory(self, directory: str, model_name: str = None, bulk: bool = False, workers: int = 1,
+                            incremental: bool = False):
         """
         Load all data from a specified directory into the SQLite database.
         If model_name is provided, only load data for that specific model and clear old data.
+        If bulk is True, notices go through bulk_load_notice_files() (offline fast path).
+        If workers > 1, notice parts are parsed by that many processes and
+        inserted by this one (parallel_load_notice_files()).
+        If incremental is True, nothing is cleared: source files whose fingerprint
+        matches load_manifest are skipped, changed notice parts are upserted by
+        NaturalKey, and other changed CSVs replace their table.
         """
+        load_start = time.perf_counter()
         print(f"Loading data from directory: {directory} into database...")
         if model_name:
             print(f"Target Model: {model_name}")
@@ -46,16 +130,30 @@ class Database:
         session = SessionLocal()
         try:
             # Helper to clear table
-            def clear_table(model):
+            def clear_table(model, *criteria):
                 print(f"Clearing table for {model.__tablename__}...")
-                session.query(model).delete()
+                session.query(model).filter(*criteria).delete(synchronize_session=False)
                 session.commit()
 
             # 1. Load Notices
             if not model_name or model_name == "NoticeModel":
-                if model_name == "NoticeModel":
-                    from app.db import NoticeModel
+                # Incremental loads touch few rows, so the triggers keep the FTS index in
+                # sync as they are written. Otherwise the triggers would index every
+                # inserted row one by one; the index is rebuilt below instead
+                keep_fts = incremental and install_notice_fts_triggers(session.bind)
+                if not keep_fts:
+                    drop_notice_fts_triggers(session.bind)
+                if not incremental:
+                    drop_notice_rollups(session.bind)
+
+                if model_name == "NoticeModel" and not incremental:
                     clear_table(NoticeModel)
+                    session.query(LoadManifestModel).filter(
+                        LoadManifestModel.path.startswith("notice" + os.sep)
+                    ).delete(synchronize_session=False)
+                    session.commit()
+                else:
+                    backfill_notice_natural_keys(session.bind)
 
                 notice_dir = os.path.join(directory, "notice")
                 if os.path.exists(notice_dir):
@@ -64,41 +162,74 @@ class Database:
                     
                     if files:
                         print(f"Found {len(files)} split notice CSV files in notice/ dir")
-                        
-                        # Use list to collect DataFrames for batch insert
-                        # Or process in parallel? SQLite doesn't like parallel writes.
-                        # Optimization: Increase chunksize and use 'multi' method if possible (not in standard pandas to_sql for sqlite)
-                        # Optimization: Use transaction for all files? Already inside a session transaction?
-                        # session.commit() is at the end. But to_sql uses its own connection/transaction unless we pass the connection.
-                        # We are passing session.bind (engine).
-                        
-                        for f in files:
-                            try:
-                                print(f"Reading {os.path.basename(f)}...")
-                                df = pd.read_csv(f, low_memory=False)
-                                df = df.where(pd.notnull(df), None)
-                                if 'StockCode' in df.columns:
-                                    # Ensure StockCode is string
-                                    df['StockCode'] = df['StockCode'].astype(str)
-                                
-                                # Generate IDs
-                                if 'id' not in df.columns:
-                                    df['id'] = [str(uuid.uuid4()) for _ in range(len(df))]
+
+                        fingerprints = {}
+                        if incremental:
+                            changed_files = []
+                            for f in files:
+                                changed, fingerprints[f] = source_fingerprint(session, directory, f)
+                                if changed:
+                                    changed_files.append(f)
                                 else:
-                                    df['id'] = df['id'].apply(lambda x: str(x) if x else str(uuid.uuid4()))
-                                    
-                                # Convert 'MarketType' to string if it exists, to match model
-                                if 'MarketType' in df.columns:
-                                    df['MarketType'] = df['MarketType'].astype(str)
-
-                                # Bulk Insert - Optimized chunksize
-                                print(f"Inserting {len(df)} notices...")
-                                df.to_sql('notices', con=session.bind, if_exists='append', index=False, chunksize=5000, method='multi')
-                                print("Done.")
-                            except Exception as e:
-                                print(f"Error reading/inserting {f}: {e}")
+                                    record_source(session, fingerprints[f])
+                            # Release the single writer connection before the loaders need it
+                            session.commit()
+                            print(f"{len(files) - len(changed_files)} notice parts unchanged since last load, skipped")
+                            files = changed_files
+                            if files:
+                                drop_notice_rollups(session.bind)
+
+                        loaded = {}
+                        if not files:
+                            pass
+                        elif workers > 1:
+                            loaded = parallel_load_notice_files(session.bind, files, workers, bulk=bulk)
+                        elif bulk:
+                            loaded = bulk_load_notice_files(session.bind, files)
+                        else:
+                            for f in files:
+                                try:
+                                    name = os.path.basename(f)
+                                    print(f"Streaming {name}...")
+                                    start = time.perf_counter()
+                                    rows = 0
+                                    changed = 0
+                                
+                                    # Each chunk is upserted before the next one is read
+                                    for chunk in iter_notice_chunks(f):
+                                        changed += chunk.to_sql('notices', con=session.bind, if_exists='append', index=False, chunksize=5000, method=upsert_notices_method) or 0
+                                        rows += len(chunk)
+                                
+                                    elapsed = time.perf_counter() - start
+                                    loaded[f] = rows
+                                    print(f"Loaded {rows} notices ({changed} new or changed) from {name} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+                                except Exception as e:
+                                    print(f"Error reading/inserting {f}: {e}")
+
+                        for f, rows in loaded.items():
+                            fingerprint = fingerprints.get(f) or source_fingerprint(session, directory, f)[1]
+                            record_source(session, fingerprint, rows)
                     else:
                         pass
+
+                # Dictionary codes for new and changed notices; the rollups group by them
+                session.commit()
+                sync_notice_codes(session.bind)
+
+                if keep_fts:
+                    print("Notice full-text index kept in sync by triggers.")
+                else:
+                    print("Building notice full-text index...")
+                    if build_notice_fts(session.bind):
+                        print("Notice full-text index ready.")
+
+                # Unchanged notices keep their rollups (a changed one was dropped above)
+                rollups_current = incremental and has_notice_rollups(session)
+                # Release the single writer connection before the rollup build needs it
+                session.commit()
+                if not rollups_current:
+                    print("Building notice facet rollups...")
+                    print(f"Notice facet rollups ready ({build_notice_rollups(session.bind)} rows).")
             
             # 2. Load other standard files
             file_map = {
@@ -110,16 +241,29 @@ class Database:
                 "timeline_details.csv": (TimelineDetailModel, "timeline_details", "stockCode", "TimelineDetailModel"),
                 "ipo_review.csv": (IPOReviewModel, "ipo_reviews", None, "IPOReviewModel")
             }
+            # Rows a file owns in its table: sector_info.csv also loads news (with
+            # inforId set), which reloading news.csv must keep
+            file_rows = {NewsModel: (NewsModel.inforId.is_(None),)}
 
             for filename, (model, table_name, str_col, m_name) in file_map.items():
                 if model_name and model_name != m_name:
                     continue
 
-                if model_name == m_name:
-                    clear_table(model)
+                if model_name == m_name and not incremental:
+                    clear_table(model, *file_rows.get(model, ()))
 
                 fpath = os.path.join(directory, filename)
                 if os.path.exists(fpath):
+                    fingerprint = None
+                    if incremental:
+                        # Small tables have no natural key: a changed file replaces its rows
+                        changed, fingerprint = source_fingerprint(session, directory, fpath)
+                        if not changed:
+                            record_source(session, fingerprint)
+                            print(f"{filename} unchanged since last load, skipped")
+                            continue
+                        clear_table(model, *file_rows.get(model, ()))
+
                     print(f"Loading {filename}...")
                     try:
                         df = pd.read_csv(fpath, low_memory=False)
@@ -138,10 +282,20 @@ class Database:
                             df['id'] = df['id'].apply(lambda x: str(x) if x else str(uuid.uuid4()))
 
                         # Additional processing
-                        if table_name == "ipo_data":
-                             # Convert dict/list cols to JSON string if they aren't already
-                             # But to_sql handles string conversion? No, we need to ensure they are strings.
-                             pass 
+                        if table_name == "ipo_data" and "timeline" in df.columns:
+                            # Parse timelines once here; the API serves timeline_json as is
+                            timelines = []
+                            bad = 0
+                            for raw in df["timeline"]:
+                                try:
+                                    value = load_timeline(raw)
+                                except ValueError:
+                                    value = []
+                                    bad += 1
+                                timelines.append(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+                            df["timeline_json"] = timelines
+                            if bad:
+                                print(f"{bad} IPO timelines could not be parsed, stored as []")
                         
                         # Handle potential column mismatches (simple approach: select only columns that exist in model)
                         # For now assume CSV matches model columns mostly.
@@ -150,6 +304,8 @@ class Database:
                         if table_name == "ipo_ranks":
                             pass
 
+                        add_date_ints(df, table_name)
+
                         # Filter columns: Keep only those that exist in the SQLAlchemy model
                         # This prevents "table has no column named X" errors
                         model_columns = {c.name for c in model.__table__.columns}
@@ -158,13 +314,27 @@ class Database:
 
                         print(f"Inserting {len(df)} items into {table_name}...")
                         df.to_sql(table_name, con=session.bind, if_exists='append', index=False, chunksize=5000, method='multi')
+                        record_source(session, fingerprint or source_fingerprint(session, directory, fpath)[1], len(df))
                         print(f"Loaded {table_name}.")
                     except Exception as e:
                         print(f"Error loading {filename}: {e}")
             
             # 3. Sector Info
             if not model_name or model_name == "SectorInfoModel":
-                if model_name == "SectorInfoModel":
+                sector_file = os.path.join(directory, "sector_info.csv")
+                fingerprint = None
+                reset = model_name == "SectorInfoModel" and not incremental
+                skip = False
+                if incremental and os.path.exists(sector_file):
+                    changed, fingerprint = source_fingerprint(session, directory, sector_file)
+                    if changed:
+                        reset = True
+                    else:
+                        record_source(session, fingerprint)
+                        print("sector_info.csv unchanged since last load, skipped")
+                        skip = True
+
+                if reset:
                     # Clear SectorInfoModel
                     clear_table(SectorInfoModel)
                     
@@ -182,8 +352,7 @@ class Database:
                     session.query(NewsModel).filter(NewsModel.inforId != None).delete(synchronize_session=False)
                     session.commit()
 
-                sector_file = os.path.join(directory, "sector_info.csv")
-                if os.path.exists(sector_file):
+                if os.path.exists(sector_file) and not skip:
                     print(f"Loading sector info from {sector_file}...")
                     try:
                         df = pd.read_csv(sector_file, low_memory=False)
@@ -227,15 +396,25 @@ class Database:
                             pd.DataFrame(sector_items).to_sql('sector_info', con=session.bind, if_exists='append', index=False, chunksize=1000)
                         
                         if news_items:
-                            pd.DataFrame(news_items).to_sql('news', con=session.bind, if_exists='append', index=False, chunksize=1000)
-                            
+                            add_date_ints(pd.DataFrame(news_items), 'news').to_sql('news', con=session.bind, if_exists='append', index=False, chunksize=1000)
+
+                        record_source(session, fingerprint or source_fingerprint(session, directory, sector_file)[1], len(df))
                         print("Sector info loaded.")
                     except Exception as e:
                         print(f"Error loading sector info: {e}")
 
             session.commit()
+            # Drops cached API responses
+            bump_data_version(session)
+
+            # Refresh planner statistics so the composite indexes get picked. After an
+            # incremental load PRAGMA optimize only re-analyzes tables that need it
+            print("Analyzing database...")
+            with session.bind.begin() as conn:
+                conn.exec_driver_sql("PRAGMA optimize" if incremental else "ANALYZE")
+
             self.loaded = True
-            print("Database load complete.")
+            print(f"Database load complete in {time.perf_counter() - load_start:.1f}s.")
         except Exception as e:
             session.rollback()
             print(f"Database load failed: {e}")
@@ -0,0 +1,133 @@
+"""
+Sortable integer shadow columns for the text date columns.
+
+The CSVs carry dates as free-form strings ("2024-01-01", "2024-01-01 15:00:00",
+"2024/1/5", ...), which compare lexically and break range filters whenever two
+formats meet. Each date column listed in DATE_INT_COLUMNS gets a `<column>Int`
+twin holding the value as a yyyymmddHHMMSS integer (NULL when unparsable),
+filled at load time; filters, sorts and indexes use the integer. API date
+parameters keep their string form and are converted with date_param().
+"""
+import re
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import text
+
+# table -> {text column: integer column}
+DATE_INT_COLUMNS = {
+    "notices": {"PublishDate": "PublishDateInt"},
+    "timeline_details": {"publishDate": "publishDateInt"},
+    "ipo_data": {"LatestDate": "LatestDateInt"},
+    "ipo_ranks": {"AcceptDate": "AcceptDateInt", "LastUpdateDate": "LastUpdateDateInt"},
+    "ipo_reviews": {"LastUpdateDate": "LastUpdateDateInt"},
+    "news": {"time": "timeInt"},
+}
+
+# yyyymmddHHMMSS // DAY_DIVISOR is yyyymmdd
+DAY_DIVISOR = 1000000
+END_OF_DAY = 235959
+
+_HAS_TIME = re.compile(r"\d:\d")
+
+
+def date_ints(values):
+    """
+    yyyymmddHHMMSS integers (nullable Int64) for a Series of date strings;
+    missing or unparsable values are <NA>.
+    """
+    strings = values.astype(object).where(values.notna(), None)
+    # Numbers like 20240101 (a CSV column pandas read as int) are parsed as text
+    strings = strings.map(lambda v: v if v is None or isinstance(v, str) else str(v))
+    parsed = pd.to_datetime(strings, errors="coerce", format="ISO8601")
+    retry = parsed.isna() & strings.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(strings[retry], errors="coerce", format="mixed")
+    dt = parsed.dt
+    ints = (
+        dt.year.astype("float64") * 10000000000 + dt.month * 100000000 + dt.day * 1000000
+        + dt.hour * 10000 + dt.minute * 100 + dt.second
+    )
+    return ints.astype("Int64")
+
+
+def date_int(value, end=False):
+    """
+    date_ints() for one string, or None. With end=True a date without a time
+    means the end of that day, so an inclusive end date covers the whole day.
+    """
+    if value is None:
+        return None
+    result = date_ints(pd.Series([value], dtype=object))[0]
+    if result is pd.NA:
+        return None
+    result = int(result)
+    if end and not _HAS_TIME.search(value) and result % DAY_DIVISOR == 0:
+        result += END_OF_DAY
+    return result
+
+
+def date_param(value, end=False):
+    """
+    date_int() for an API date parameter; unparsable dates are a 400.
+    """
+    result = date_int(value, end)
+    if result is None:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+    return result
+
+
+def date_range_conditions(column, start_date=None, end_date=None):
+    """
+    Filter conditions on an integer date column for optional inclusive
+    start/end date parameters.
+    """
+    conditions = []
+    if start_date:
+        conditions.append(column >= date_param(start_date))
+    if end_date:
+        conditions.append(column <= date_param(end_date, end=True))
+    return conditions
+
+
+def add_date_ints(df, table_name):
+    """
+    Set the integer date columns of `table_name` on a DataFrame about to be
+    inserted, for the text columns it has.
+    """
+    for column, int_column in DATE_INT_COLUMNS.get(table_name, {}).items():
+        if column in df.columns:
+            df[int_column] = date_ints(df[column])
+    return df
+
+
+def backfill_date_ints(bind):
+    """
+    Fill integer date columns that are NULL while their text column is set:
+    rows loaded before the columns existed. Returns the number of rows updated.
+    """
+    updated = 0
+    with bind.begin() as conn:
+        for table, columns in DATE_INT_COLUMNS.items():
+            existing = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+            for column, int_column in columns.items():
+                if column not in existing or int_column not in existing:
+                    continue
+                rows = conn.execute(text(
+                    f'SELECT rowid, "{column}" FROM "{table}" '
+                    f'WHERE "{int_column}" IS NULL AND "{column}" IS NOT NULL'
+                )).all()
+                if not rows:
+                    continue
+                frame = pd.DataFrame(rows, columns=["rid", "value"])
+                frame["value"] = date_ints(frame["value"])
+                frame = frame[frame["value"].notna()]
+                if frame.empty:
+                    continue
+                print(f"Filling {table}.{int_column} for {len(frame)} rows...")
+                conn.exec_driver_sql(
+                    f'UPDATE "{table}" SET "{int_column}" = ? WHERE rowid = ?',
+                    [(int(v), int(r)) for r, v in zip(frame["rid"], frame["value"])]
+                )
+                updated += len(frame)
+    return updated
@@ -1,17 +1,114 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, event, Column, Index, Integer, String, Float, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# Database URL (SQLite)
-DATABASE_URL = "sqlite:///./jianweidata.db"
+from app.dates import backfill_date_ints
+from app.dictionary import sync_notice_codes
+
+# Database file (SQLite)
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "./jianweidata.db")
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+
+# Connection tuning, applied on every new connection
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", "30000"))  # ms
+
+# Read-only connections used by API reads
+READ_POOL_SIZE = int(os.environ.get("READ_POOL_SIZE", "8"))
+
+# How often (seconds) sessions check whether DATABASE_PATH was swapped to a new build
+SWAP_CHECK_INTERVAL = float(os.environ.get("SWAP_CHECK_INTERVAL", "1"))
+
+def _set_sqlite_pragmas(dbapi_connection, read_only):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+    if not read_only:
+        # journal_mode is persistent in the file; only the writer may change it
+        cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+def create_sqlite_engine(path, read_only=False):
+    """
+    Writer engines hold a single connection so loads and favorites serialize on it;
+    reader engines open the file with mode=ro and may pool several connections.
+    """
+    if read_only:
+        url = f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true"
+        pool_args = {"pool_size": READ_POOL_SIZE, "max_overflow": READ_POOL_SIZE}
+    else:
+        url = f"sqlite:///{path}"
+        pool_args = {"pool_size": 1, "max_overflow": 0}
+
+    new_engine = create_engine(
+        url, connect_args={"check_same_thread": False}, pool_timeout=SQLITE_BUSY_TIMEOUT / 1000, **pool_args
+    )
+
+    @event.listens_for(new_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, read_only)
 
-# Create Engine
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+    return new_engine
 
-# SessionLocal
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# SessionLocal (read-write) / ReadSessionLocal (read-only), bound by open_database()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+engine = None
+read_engine = None
+opened_path = None
+_swap_lock = threading.Lock()
+_swap_checked_at = 0.0
+
+def open_database(path=DATABASE_PATH):
+    """
+    (Re)create the engines on the file `path` currently resolves to and bind the
+    session factories to them: one writer (loads, favorites) and a read-only
+    pool (API reads). Engines are opened on the resolved path, so a later swap
+    of a DATABASE_PATH symlink never mixes files within one pool. Sessions that
+    are already open keep their connection to the previous file until closed.
+    """
+    global engine, read_engine, opened_path
+    old_engines = (engine, read_engine)
+    opened_path = os.path.realpath(path)
+    engine = create_sqlite_engine(opened_path)
+    read_engine = create_sqlite_engine(opened_path, read_only=True)
+    SessionLocal.configure(bind=engine)
+    ReadSessionLocal.configure(bind=read_engine)
+    for old in old_engines:
+        if old is not None:
+            # Checked-out connections are not closed; they go away when returned
+            old.dispose()
+
+def reopen_if_swapped():
+    """
+    Re-open the engines when DATABASE_PATH points at a different file than the
+    one they were opened on (see app/swap.py). Checked at most once per
+    SWAP_CHECK_INTERVAL seconds.
+    """
+    global _swap_checked_at
+    now = time.monotonic()
+    if now - _swap_checked_at < SWAP_CHECK_INTERVAL:
+        return
+    with _swap_lock:
+        if now - _swap_checked_at < SWAP_CHECK_INTERVAL:
+            return
+        _swap_checked_at = now
+        if os.path.realpath(DATABASE_PATH) != opened_path:
+            print(f"Database swapped, reopening {os.path.realpath(DATABASE_PATH)}")
+            open_database(DATABASE_PATH)
+
+open_database(DATABASE_PATH)
 
 # Base class
 Base = declarative_base()
@@ -86,13 +183,13 @@ class NoticeModel(Base):
     id = Column(String, primary_key=True, index=True)
     Administration = Column(String)
     Availability = Column(String)
-    Category = Column(String, index=True)
+    Category = Column(String)
     DocumentKey = Column(String)
     DocumentNo = Column(String)
     EncryptionKey = Column(String)
     FileType = Column(String) # flexible
     Href = Column(String)
-    Industry = Column(String, index=True)
+    Industry = Column(String)
     Institutions = Column(String)
     IntermediaryName = Column(String)
     IntermediaryType = Column(String)
@@ -101,13 +198,15 @@ class NoticeModel(Base):
     IsFav = Column(String)
     Key = Column(String)
     LawType = Column(String)
-    MarketType = Column(String, index=True)
-    NoticeType = Column(String, index=True)
+    MarketType = Column(String)
+    NoticeType = Column(String)
     ParentIndustry = Column(String)
     Preview = Column(Text)
-    Province = Column(String, index=True)
+    Province = Column(String)
     PublishDate = Column(String, index=True)
-    Publisher = Column(String, index=True)
+    # PublishDate as a yyyymmddHHMMSS integer (app/dates.py): date filters, sorts and indexes use it
+    PublishDateInt = Column(Integer)
+    Publisher = Column(String)
     Source = Column(Text)
     SourcePath = Column(String)
     StockCode = Column(String, index=True)
@@ -115,7 +214,54 @@ class NoticeModel(Base):
     Title = Column(String, index=True)
     TotalPage = Column(String)
     Url = Column(String)
-    sector = Column(String, index=True)
+    sector = Column(String)
+    # sector + source identifier, set by the loader; upsert target for incremental loads
+    NaturalKey = Column(String)
+    # notice_dictionary codes of the low-cardinality columns (app/dictionary.py):
+    # filters, facets and indexes use them
+    sectorId = Column(Integer)  # leading column of the composite indexes below
+    NoticeTypeId = Column(Integer)
+    IndustryId = Column(Integer)
+    MarketTypeId = Column(Integer)
+    ProvinceId = Column(Integer)
+    CategoryId = Column(Integer)
+    IntermediaryTypeId = Column(Integer)
+    SourceId = Column(Integer)
+
+    # Every /notices query filters sectorId = ? first, so indexes lead with it
+    __table_args__ = (
+        # sectorId = ? ORDER BY PublishDateInt DESC, rowid DESC (pages, keyset cursors)
+        Index("ix_notices_sectorId_PublishDateInt", "sectorId", "PublishDateInt"),
+        # StockCode IN (...) ORDER BY PublishDateInt DESC
+        Index("ix_notices_sectorId_StockCode_PublishDateInt", "sectorId", "StockCode", "PublishDateInt"),
+        # Per-facet filters
+        Index("ix_notices_sectorId_NoticeTypeId", "sectorId", "NoticeTypeId"),
+        Index("ix_notices_sectorId_IndustryId", "sectorId", "IndustryId"),
+        Index("ix_notices_sectorId_MarketTypeId", "sectorId", "MarketTypeId"),
+        Index("ix_notices_sectorId_ProvinceId", "sectorId", "ProvinceId"),
+        Index("ix_notices_sectorId_CategoryId", "sectorId", "CategoryId"),
+        Index("ix_notices_sectorId_Publisher", "sectorId", "Publisher"),
+        Index("ix_notices_sectorId_Institutions", "sectorId", "Institutions"),
+        Index("ix_notices_sectorId_IntermediaryTypeId", "sectorId", "IntermediaryTypeId"),
+        Index("ix_notices_sectorId_IntermediaryName", "sectorId", "IntermediaryName"),
+        # INSERT ... ON CONFLICT("NaturalKey") target
+        Index("ux_notices_NaturalKey", "NaturalKey", unique=True),
+    )
+
+class NoticeDictionaryModel(Base):
+    """
+    Integer codes for the values of the dictionary-encoded notice columns
+    (app/dictionary.py).
+    """
+    __tablename__ = "notice_dictionary"
+
+    field = Column(String, primary_key=True)  # notices column name
+    code = Column(Integer, primary_key=True, autoincrement=False)
+    value = Column(String)
+
+    __table_args__ = (
+        Index("ux_notice_dictionary_field_value", "field", "value", unique=True),
+    )
 
 class EventModel(Base):
     __tablename__ = "events"
@@ -142,10 +288,16 @@ class NewsModel(Base):
     newsId = Column(String, index=True)
     source = Column(String)
     time = Column(String, index=True)
+    timeInt = Column(Integer)  # time as yyyymmddHHMMSS (app/dates.py)
     title = Column(String)
     url = Column(String)
     inforId = Column(String, index=True)
 
+    __table_args__ = (
+        # Per-source news newest first (/sector/information)
+        Index("ix_news_inforId_timeInt", "inforId", "timeInt"),
+    )
+
 class SectorInfoModel(Base):
     __tablename__ = "sector_info"
     
@@ -161,6 +313,7 @@ class IPODataModel(Base):
     id = Column(String, primary_key=True, index=True)
     Issuer = Column(String, index=True)
     LatestDate = Column(String, index=True)
+    LatestDateInt = Column(Integer, index=True)  # LatestDate as yyyymmddHHMMSS (app/dates.py)
     ListingMarket = Column(String, index=True)
     Status = Column(String, index=True)
     address = Column(String)
@@ -197,6 +350,8 @@ class IPODataModel(Base):
     stockCode = Column(String)
     telePhone = Column(String)
     timeline = Column(Text)
+    # timeline parsed and re-serialized as canonical JSON at load time
+    timeline_json = Column(Text)
     timingPlan = Column(String)
     topTenShareholders = Column(Text)
     updateTime = Column(String)
@@ -207,12 +362,14 @@ class IPORankModel(Base):
     
     id = Column(String, primary_key=True, index=True)
     AcceptDate = Column(String)
+    AcceptDateInt = Column(Integer, index=True)  # AcceptDate as yyyymmddHHMMSS (app/dates.py)
     AccountingFirm = Column(String)
     CurrentStatuses = Column(String)
     Entity = Column(String, index=True)
     HasQa = Column(Integer)
     Industry = Column(String)
     LastUpdateDate = Column(String)
+    LastUpdateDateInt = Column(Integer, index=True)  # LastUpdateDate as yyyymmddHHMMSS (app/dates.py)
     LawFirm = Column(String)
     ListingMarket = Column(String)
     OnsiteInspection = Column(String)
@@ -271,6 +428,7 @@ class TimelineDetailModel(Base):
     fileType = Column(Integer)
     process_result = Column(String)
     publishDate = Column(String)
+    publishDateInt = Column(Integer)  # publishDate as yyyymmddHHMMSS (app/dates.py)
     sector = Column(Integer)
     stockCode = Column(String, index=True)
     stockTicker = Column(String)
@@ -278,6 +436,10 @@ class TimelineDetailModel(Base):
     url = Column(String)
     year = Column(Integer)
 
+    __table_args__ = (
+        Index("ix_timeline_details_stockCode_publishDateInt", "stockCode", "publishDateInt"),
+    )
+
 class IPOReviewModel(Base):
     __tablename__ = "ipo_reviews"
     
@@ -286,6 +448,7 @@ class IPOReviewModel(Base):
     Entity = Column(String, index=True)
     HasQa = Column(Integer)
     LastUpdateDate = Column(String)
+    LastUpdateDateInt = Column(Integer, index=True)  # LastUpdateDate as yyyymmddHHMMSS (app/dates.py)
     Rank = Column(Integer)
     RelatedDocuments = Column(Text)
     ReviewQuestions = Column(Text)
@@ -338,10 +501,143 @@ class FavoriteNoticeModel(Base):
     user_id = Column(String, index=True, default="default_user") # Placeholder for user system
     create_time = Column(String)
 
+class LoadManifestModel(Base):
+    """
+    Fingerprint of every source file `manage.py load` has loaded, so that
+    incremental loads can skip files that have not changed.
+    """
+    __tablename__ = "load_manifest"
+
+    path = Column(String, primary_key=True)  # relative to the data directory
+    size = Column(Integer)
+    mtime = Column(Float)
+    sha256 = Column(String)
+    rows = Column(Integer)
+    loaded_at = Column(String)
+
+class AppMetaModel(Base):
+    """
+    Small key/value table for database-level metadata (e.g. data_version).
+    """
+    __tablename__ = "app_meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(String)
+
+def read_data_version(db_session):
+    row = db_session.get(AppMetaModel, "data_version")
+    return row.value if row is not None else None
+
+def read_favorites_version(db_session):
+    row = db_session.get(AppMetaModel, "favorites_version")
+    return row.value if row is not None else None
+
+def _bump_version(db_session, key):
+    row = db_session.get(AppMetaModel, key)
+    if row is None:
+        row = AppMetaModel(key=key)
+        db_session.add(row)
+    version = row.value = str(time.time_ns())
+    # Reading row.value after the commit would reload it and hold the
+    # single writer connection in a new transaction
+    db_session.commit()
+    return version
+
+def bump_data_version(db_session):
+    """
+    Mark the data as changed so cached API responses and in-memory indexes
+    are dropped. The value is a timestamp rather than a counter so that it
+    also differs between builds (app/swap.py).
+    """
+    return _bump_version(db_session, "data_version")
+
+def bump_favorites_version(db_session):
+    """
+    Mark favorites (notices.IsFav) as changed: only cached responses that
+    carry IsFav are dropped; indexes and snapshots built on data_version stay.
+    """
+    return _bump_version(db_session, "favorites_version")
+
+def ensure_columns(bind):
+    """
+    create_all() never alters existing tables: add columns that were introduced
+    on a model after its table was created (as NULL-able columns).
+    """
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table.name}")')}
+            if not existing:
+                continue
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=bind.dialect)
+                    print(f"Adding column {table.name}.{column.name}")
+                    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}')
+
+# Indexes replaced by ones on the integer date and dictionary code columns
+OBSOLETE_INDEXES = [
+    "ix_notices_sector_PublishDate",
+    "ix_notices_sector_StockCode_PublishDate",
+    "ix_timeline_details_stockCode_publishDate",
+    "ix_news_inforId_time",
+    "ix_notices_sector_PublishDateInt",
+    "ix_notices_sector_StockCode_PublishDateInt",
+    "ix_notices_sector_NoticeType",
+    "ix_notices_sector_Industry",
+    "ix_notices_sector_MarketType",
+    "ix_notices_sector_Province",
+    "ix_notices_sector_Category",
+    "ix_notices_sector_Publisher",
+    "ix_notices_sector_Institutions",
+    "ix_notices_sector_IntermediaryType",
+    "ix_notices_sector_IntermediaryName",
+    # Single-column indexes of the original schema, superseded by the sectorId composites
+    "ix_notices_sector",
+    "ix_notices_Category",
+    "ix_notices_Industry",
+    "ix_notices_MarketType",
+    "ix_notices_NoticeType",
+    "ix_notices_Province",
+    "ix_notices_Publisher",
+]
+
 def init_db():
+    """
+    Create and migrate the schema of the open database (see `manage.py
+    migrate`). Writes to the file, so it is never run by importing the app.
+    """
     Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
+    # Rows loaded before the integer date and code columns existed
+    backfilled = backfill_date_ints(engine) + sync_notice_codes(engine)
+    with engine.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+    # create_all() skips tables that already exist, so add indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    if backfilled:
+        # Planner statistics for the indexes on the new columns
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
 
 def get_db():
+    """
+    Read-only session for API reads.
+    """
+    reopen_if_swapped()
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_write_db():
+    """
+    Session on the single writer connection, for request handlers that write.
+    """
+    reopen_if_swapped()
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,66 @@
+"""
+Dictionary encoding for the low-cardinality notice columns.
+
+sector, NoticeType, Industry, MarketType, Province, Category, IntermediaryType
+and Source repeat a few hundred distinct strings across every notice. Each
+value gets a small integer code in `notice_dictionary` (field, code, value),
+and notices carry the codes in `<column>Id` columns next to the text. Filters,
+indexes, facet GROUP BYs and rollups work on the codes; only the facet values
+returned to the client are decoded. The text columns stay for the row data.
+
+Codes are assigned by sync_notice_codes() after every notice load (and for
+rows loaded before the columns existed); a code never changes once assigned.
+The notice upsert clears a row's code when its text changes, so the next sync
+recodes it.
+"""
+from sqlalchemy import text
+
+DICTIONARY_TABLE = "notice_dictionary"
+
+# notices text column -> code column
+DICTIONARY_COLUMNS = {
+    "sector": "sectorId",
+    "NoticeType": "NoticeTypeId",
+    "Industry": "IndustryId",
+    "MarketType": "MarketTypeId",
+    "Province": "ProvinceId",
+    "Category": "CategoryId",
+    "IntermediaryType": "IntermediaryTypeId",
+    "Source": "SourceId",
+}
+
+
+def sync_notice_codes(bind):
+    """
+    Add the values of uncoded notices to the dictionary and set their codes.
+    Returns the number of notices updated.
+    """
+    with bind.begin() as conn:
+        existing = {row[1] for row in conn.exec_driver_sql('PRAGMA table_info("notices")')}
+        columns = {c: i for c, i in DICTIONARY_COLUMNS.items() if c in existing and i in existing}
+        if not columns:
+            return 0
+        missing = " OR ".join(f'("{i}" IS NULL AND "{c}" IS NOT NULL)' for c, i in columns.items())
+        if conn.exec_driver_sql(f"SELECT 1 FROM notices WHERE {missing} LIMIT 1").first() is None:
+            return 0
+
+        for column, id_column in columns.items():
+            # New values are numbered after the field's current codes, in value order
+            added = conn.execute(text(
+                f"INSERT INTO {DICTIONARY_TABLE} (field, code, value) "
+                f"SELECT :field, (SELECT coalesce(max(code), 0) FROM {DICTIONARY_TABLE} WHERE field = :field) "
+                f"+ row_number() OVER (ORDER BY value), value FROM ("
+                f'SELECT DISTINCT "{column}" AS value FROM notices WHERE "{id_column}" IS NULL AND "{column}" IS NOT NULL '
+                f"EXCEPT SELECT value FROM {DICTIONARY_TABLE} WHERE field = :field)"
+            ), {"field": column}).rowcount
+            if added:
+                print(f"Notice dictionary: {added} new {column} values")
+
+        assignments = ", ".join(
+            f'"{i}" = coalesce("{i}", (SELECT code FROM {DICTIONARY_TABLE} d '
+            f"WHERE d.field = '{c}' AND d.value = notices.\"{c}\"))"
+            for c, i in columns.items()
+        )
+        updated = conn.exec_driver_sql(f"UPDATE notices SET {assignments} WHERE {missing}").rowcount
+        print(f"Coded {updated} notices")
+        return updated
@@ -0,0 +1,58 @@
+"""
+Execution model for the API.
+
+Route handlers that touch the database are plain `def` functions, so FastAPI runs
+them (and the get_db dependency) in anyio's worker thread pool instead of on the
+event loop. The pool is bounded by DB_WORKERS. Heavy routes also take a permit
+from a per-route limit, so a burst of facet queries cannot occupy every worker
+thread and starve light routes such as /companies/search.
+"""
+import asyncio
+import os
+
+import anyio.to_thread
+from fastapi import HTTPException
+
+# Worker threads available to all sync route handlers
+DB_WORKERS = int(os.environ.get("DB_WORKERS", "16"))
+
+# Max concurrent requests per heavy route (must stay below DB_WORKERS)
+ROUTE_CONCURRENCY = {
+    "notices": int(os.environ.get("NOTICES_CONCURRENCY", "4")),
+    "notices_search": int(os.environ.get("NOTICES_SEARCH_CONCURRENCY", "4")),
+    "timeline": int(os.environ.get("TIMELINE_CONCURRENCY", "4")),
+}
+
+# Seconds a request may wait for a route permit before getting 503
+ROUTE_QUEUE_TIMEOUT = float(os.environ.get("ROUTE_QUEUE_TIMEOUT", "30"))
+
+_semaphores = {}
+
+
+def configure_thread_pool():
+    """
+    Size the default anyio thread limiter. Must be called from the event loop
+    (e.g. in the app lifespan).
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = DB_WORKERS
+    print(f"DB worker threads: {DB_WORKERS}, route limits: {ROUTE_CONCURRENCY}")
+
+
+def route_limit(name):
+    """
+    Dependency that holds one of `ROUTE_CONCURRENCY[name]` permits while the
+    route runs. Waiting happens on the event loop, not in a worker thread.
+    """
+    async def limit():
+        sem = _semaphores.get(name)
+        if sem is None:
+            sem = _semaphores[name] = asyncio.Semaphore(ROUTE_CONCURRENCY[name])
+        try:
+            await asyncio.wait_for(sem.acquire(), ROUTE_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        try:
+            yield
+        finally:
+            sem.release()
+    return limit
@@ -0,0 +1,123 @@
+"""
+Single-pass facet engine for POST /notices.
+
+The filtered notice set is evaluated once into a TEMP table holding the rowid,
+the sort key and every facet column the sector needs. Total, distinct publisher
+count, all top-N facets and the page of ids are then read from that table, so
+the (possibly expensive) filter runs once per request instead of once per facet.
+"""
+import uuid
+
+from sqlalchemy import (
+    Table, Column, Integer, MetaData, insert, select, func, literal, literal_column, union_all
+)
+
+from app.db import NoticeModel
+from app.pagination import encode_cursor
+
+FACET_LIMIT = 50
+
+
+class NoticeResultSet:
+    def __init__(self, db_session, query, columns):
+        """
+        query: filtered NoticeModel query (no ordering/pagination).
+        columns: NoticeModel column attributes to carry for facets.
+        """
+        self.db_session = db_session
+        self.columns = []
+        for col in [NoticeModel.PublishDateInt] + list(columns):
+            if col.key not in [c.key for c in self.columns]:
+                self.columns.append(col)
+
+        self.table = Table(
+            f"notice_rs_{uuid.uuid4().hex}", MetaData(),
+            Column("rid", Integer),
+            *[Column(c.key, NoticeModel.__table__.c[c.key].type) for c in self.columns],
+            prefixes=["TEMPORARY"]
+        )
+        conn = db_session.connection()
+        self.table.create(conn)
+
+        source = query.with_entities(literal_column("notices.rowid"), *self.columns).statement
+        conn.execute(insert(self.table).from_select(
+            ["rid"] + [c.key for c in self.columns], source
+        ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.table.drop(self.db_session.connection(), checkfirst=True)
+
+    def summary(self, distinct_key=None):
+        """
+        Returns (total, distinct count of `distinct_key`). Like SELECT DISTINCT,
+        NULL counts as one distinct value.
+        """
+        t = self.table
+        if distinct_key is None:
+            return self.db_session.execute(select(func.count()).select_from(t)).scalar(), None
+        col = t.c[distinct_key]
+        total, distinct, has_null = self.db_session.execute(
+            select(func.count(), func.count(col.distinct()), func.max(col.is_(None)))
+        ).one()
+        return total, distinct + (has_null or 0)
+
+    def facets(self, fields, limit=FACET_LIMIT):
+        """
+        Top `limit` values per field in one UNION ALL query.
+        fields: list of (facet_key, column_key, label_column_key or None).
+        Returns {facet_key: [(value, label, count), ...]} ordered by count desc.
+        """
+        if not fields:
+            return {}
+        t = self.table
+        parts = []
+        for facet_key, col_key, label_key in fields:
+            col = t.c[col_key]
+            label = func.max(t.c[label_key]) if label_key else literal(None)
+            parts.append(
+                select(
+                    literal(facet_key).label("facet"),
+                    col.label("value"),
+                    label.label("label"),
+                    func.count(col).label("cnt")
+                ).where(col.isnot(None)).group_by(col)
+                .order_by(func.count(col).desc()).limit(limit)
+                .subquery().select()
+            )
+        rows = self.db_session.execute(union_all(*parts)).all()
+
+        result = {facet_key: [] for facet_key, _, _ in fields}
+        for facet_key, value, label, cnt in rows:
+            result[facet_key].append((value, label, cnt))
+        for items in result.values():
+            items.sort(key=lambda r: r[2], reverse=True)
+        return result
+
+    def page(self, offset, limit, entity=NoticeModel):
+        """
+        Page of `entity` rows (NoticeModel or an app.projection Bundle) ordered
+        by (PublishDateInt, rowid) desc.
+        Returns (rows, next_cursor) like app.pagination.offset_page().
+        """
+        t = self.table
+        keys = self.db_session.execute(
+            select(t.c.rid, t.c.PublishDateInt)
+            .order_by(t.c.PublishDateInt.desc(), t.c.rid.desc()).offset(offset).limit(limit)
+        ).all()
+        if not keys:
+            return [], None
+        rids = [k[0] for k in keys]
+        rowid = literal_column("notices.rowid")
+        rows = self.db_session.query(entity, rowid).filter(rowid.in_(rids)).all()
+        by_rid = {rid: notice for notice, rid in rows}
+        next_cursor = None
+        if len(keys) == limit:
+            last_rid, last_date = keys[-1]
+            next_cursor = encode_cursor([last_date, last_rid])
+        return [by_rid[rid] for rid in rids if rid in by_rid], next_cursor
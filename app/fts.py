@@ -0,0 +1,231 @@
+"""
+SQLite FTS5 index for notice keyword search.
+
+`notices_fts` is an external-content FTS5 table over `notices`, keyed by the
+notices rowid and tokenized with `trigram` so that Chinese text (which has no
+word boundaries) can be matched by substring. `manage.py load` rebuilds it after
+notices are inserted and installs triggers that keep it in sync afterwards.
+
+Keyword filters compile to `notices.rowid IN (SELECT rowid FROM notices_fts
+WHERE notices_fts MATCH ...)`. /notices/search matches all indexed columns and,
+for order_by="relevance", joins notices_fts to rank by weighted bm25(). Terms the trigram index cannot answer (shorter
+than 3 characters, or containing LIKE wildcards) keep using the ILIKE path, and
+setting KEYWORD_SEARCH_BACKEND=like disables the index entirely.
+"""
+import os
+
+from sqlalchemy import and_, or_, column, func, select, literal_column, table, text
+
+NOTICE_FTS_TABLE = "notices_fts"
+# Title/Preview serve the /notices keyword filters (column-qualified MATCH);
+# all of them together serve /notices/search
+NOTICE_FTS_COLUMNS = ["Title", "Preview", "StockCode", "StockTicker", "NoticeType", "MarketType", "Province"]
+
+# Per-column bm25() weights for order_by="relevance" in /notices/search
+NOTICE_SEARCH_WEIGHTS = {
+    "Title": 10.0,
+    "StockCode": 8.0,
+    "StockTicker": 8.0,
+    "NoticeType": 4.0,
+    "MarketType": 2.0,
+    "Province": 2.0,
+    "Preview": 1.0,
+}
+
+# "fts" (default) or "like" (always use the old ILIKE scan)
+KEYWORD_SEARCH_BACKEND = os.environ.get("KEYWORD_SEARCH_BACKEND", "fts")
+
+# The trigram tokenizer cannot match anything shorter than one trigram
+MIN_FTS_TERM_LENGTH = 3
+
+_TRIGGERS = ("notices_fts_ai", "notices_fts_ad", "notices_fts_au")
+
+
+def _trigger_sql():
+    cols = ", ".join(NOTICE_FTS_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in NOTICE_FTS_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in NOTICE_FTS_COLUMNS)
+    t = NOTICE_FTS_TABLE
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS notices_fts_ai AFTER INSERT ON notices BEGIN
+            INSERT INTO {t}(rowid, {cols}) VALUES (new.rowid, {new_vals});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS notices_fts_ad AFTER DELETE ON notices BEGIN
+            INSERT INTO {t}({t}, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS notices_fts_au AFTER UPDATE OF {cols} ON notices BEGIN
+            INSERT INTO {t}({t}, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals});
+            INSERT INTO {t}(rowid, {cols}) VALUES (new.rowid, {new_vals});
+        END""",
+    ]
+
+
+def drop_notice_fts_triggers(bind):
+    """
+    Drop the sync triggers so bulk inserts/deletes on notices don't pay for
+    per-row index maintenance. build_notice_fts() re-creates them.
+    """
+    with bind.begin() as conn:
+        for name in _TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+def _indexed_columns(conn):
+    """Columns of the existing notices_fts table, or None when there is none."""
+    rows = conn.execute(text(f"SELECT name FROM pragma_table_info('{NOTICE_FTS_TABLE}')")).all()
+    return [r[0] for r in rows] or None
+
+
+def build_notice_fts(bind):
+    """
+    Create (if needed) and fully rebuild the notice FTS index, then install the
+    sync triggers. An index over other columns (built by an older version) is
+    dropped and re-created. Returns False if this SQLite build has no
+    FTS5/trigram support.
+    """
+    t = NOTICE_FTS_TABLE
+    cols = ", ".join(NOTICE_FTS_COLUMNS)
+    try:
+        with bind.begin() as conn:
+            existing = _indexed_columns(conn)
+            if existing is not None and existing != NOTICE_FTS_COLUMNS:
+                for name in _TRIGGERS:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                conn.execute(text(f"DROP TABLE {t}"))
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {t} USING fts5("
+                f"{cols}, content='notices', content_rowid='rowid', tokenize='trigram')"
+            ))
+            conn.execute(text(f"INSERT INTO {t}({t}) VALUES ('rebuild')"))
+            for ddl in _trigger_sql():
+                conn.execute(text(ddl))
+    except Exception as e:
+        print(f"FTS index not built (falling back to LIKE search): {e}")
+        return False
+    return True
+
+
+def install_notice_fts_triggers(bind):
+    """
+    Install the sync triggers on an existing index without rebuilding it, for
+    loads that touch few rows. Returns False if the index does not exist yet
+    or covers other columns (it then needs build_notice_fts()).
+    """
+    with bind.begin() as conn:
+        if _indexed_columns(conn) != NOTICE_FTS_COLUMNS:
+            return False
+        for ddl in _trigger_sql():
+            conn.execute(text(ddl))
+    return True
+
+
+def has_notice_fts(db_session):
+    if KEYWORD_SEARCH_BACKEND != "fts":
+        return False
+    row = db_session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": NOTICE_FTS_TABLE}
+    ).first()
+    return row is not None
+
+
+def has_notice_search_fts(db_session):
+    """
+    True if notices_fts covers every /notices/search column (an index built
+    before the search columns were added only has Title and Preview).
+    """
+    if KEYWORD_SEARCH_BACKEND != "fts":
+        return False
+    return _indexed_columns(db_session.connection()) == NOTICE_FTS_COLUMNS
+
+
+def fts_searchable(term):
+    return len(term) >= MIN_FTS_TERM_LENGTH and "%" not in term and "_" not in term
+
+
+def _fts_phrase(col, term):
+    escaped = term.replace('"', '""')
+    if col is None:
+        return f'"{escaped}"'
+    return f'{col.key} : "{escaped}"'
+
+
+def _fts_rowids(col, terms, operator):
+    expr = f" {operator} ".join(_fts_phrase(col, t) for t in terms)
+    return select(literal_column("rowid")).select_from(table(NOTICE_FTS_TABLE)).where(
+        literal_column(NOTICE_FTS_TABLE).op("MATCH")(expr)
+    )
+
+
+def keyword_condition(col, terms, match_mode, use_fts=False):
+    """
+    Build the filter for a list of keywords against a notice text column.
+    match_mode: "all" (every term), "any" (at least one) or "none" (no term).
+    Returns None when there is nothing to filter on.
+    """
+    terms = [t for t in terms if t]
+    if not terms:
+        return None
+
+    fts_terms = [t for t in terms if use_fts and fts_searchable(t)]
+    like_terms = [t for t in terms if t not in fts_terms]
+    rowid = literal_column(f"{col.table.name}.rowid")
+
+    if match_mode == "all":
+        conditions = [col.ilike(f"%{k}%") for k in like_terms]
+        if fts_terms:
+            conditions.append(rowid.in_(_fts_rowids(col, fts_terms, "AND")))
+        return and_(*conditions)
+    elif match_mode == "any":
+        conditions = [col.ilike(f"%{k}%") for k in like_terms]
+        if fts_terms:
+            conditions.append(rowid.in_(_fts_rowids(col, fts_terms, "OR")))
+        return or_(*conditions)
+    elif match_mode == "none":
+        conditions = [~col.ilike(f"%{k}%") for k in like_terms]
+        if fts_terms:
+            # NOT (NULL LIKE ...) is NULL, so the LIKE path never returned NULL columns
+            conditions.append(col.isnot(None))
+            conditions.append(rowid.notin_(_fts_rowids(col, fts_terms, "OR")))
+        return and_(*conditions)
+    return None
+
+
+def notice_search_match(keyword, stock_code=None):
+    """
+    MATCH condition on notices_fts for `keyword` in any indexed column (the
+    /notices/search columns). A stock_code filter is added to the lookup as a
+    StockCode term, narrowing the index matches; it is a substring match, so
+    the caller still filters StockCode exactly.
+    """
+    expr = _fts_phrase(None, keyword)
+    if stock_code and fts_searchable(stock_code):
+        expr += " AND " + _fts_phrase(literal_column("StockCode"), stock_code)
+    return literal_column(NOTICE_FTS_TABLE).op("MATCH")(expr)
+
+
+def notice_search_rowids(keyword, stock_code=None):
+    """Subquery of the notices rowids matching notice_search_match()."""
+    return select(literal_column("rowid")).select_from(table(NOTICE_FTS_TABLE)).where(
+        notice_search_match(keyword, stock_code)
+    )
+
+
+def notice_search_score():
+    """
+    bm25() of the current notices_fts match, weighted per column by
+    NOTICE_SEARCH_WEIGHTS. Lower is more relevant (bm25() is negated).
+    """
+    weights = [literal_column(repr(NOTICE_SEARCH_WEIGHTS[c])) for c in NOTICE_FTS_COLUMNS]
+    return func.bm25(literal_column(NOTICE_FTS_TABLE), *weights)
+
+
+def join_notice_search(query, keyword, stock_code=None):
+    """
+    Join a notices query to its notices_fts matches for `keyword`, so that
+    notice_search_score() can rank them.
+    """
+    fts = table(NOTICE_FTS_TABLE, column("rowid"))
+    return query.join(fts, fts.c.rowid == literal_column("notices.rowid")).filter(
+        notice_search_match(keyword, stock_code)
+    )
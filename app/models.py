@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Literal
 
 # 1. Company Detail Model
 class Company(BaseModel):
@@ -246,6 +246,7 @@ class IPODataBasic(BaseModel):
 class IPOListResponse(BaseModel):
     total: int
     data: List[IPODataBasic]
+    next_cursor: Optional[str] = None
 
 class IPORankBasic(BaseModel):
     id: Optional[str] = None
@@ -264,6 +265,7 @@ class IPORankBasic(BaseModel):
 class IPORankListResponse(BaseModel):
     total: int
     data: List[IPORankBasic]
+    next_cursor: Optional[str] = None
 
 # 6. Timeline Detail Model
 class TimelineDetail(BaseModel):
@@ -286,6 +288,7 @@ class TimelineDetailListResponse(BaseModel):
     total: int
     data: List[TimelineDetail]
     facets: Optional[Dict[str, Any]] = None
+    next_cursor: Optional[str] = None
 
 # 7. IPO Review Model
 class IPOReview(BaseModel):
@@ -351,6 +354,7 @@ class IPOReviewBasic(BaseModel):
 class IPOReviewListResponse(BaseModel):
     total: int
     data: List[IPOReviewBasic]
+    next_cursor: Optional[str] = None
 
 # Response Models (List wrappers)
 class CompanyBaseItem(BaseModel):
@@ -361,7 +365,10 @@ class CompanyBaseItem(BaseModel):
 
 class GlobalSearchResponse(BaseModel):
     total: int
+    total_display: Optional[str] = None
+    count_strategy: Optional[str] = None
     data: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
 
 
 class FacetItem(BaseModel):
@@ -382,15 +389,23 @@ class Facets(BaseModel):
     IntermediaryType: List[FacetItem] = []
     IntermediaryName: List[FacetItem] = []
 
+CountStrategy = Literal["exact", "capped", "estimated"]
+
 class NoticeListResponse(BaseModel):
     total: int
+    total_display: Optional[str] = Field(None, description="total as shown to users: '10000+' when capped, '~N' when estimated")
+    count_strategy: Optional[str] = Field(None, description="Counting strategy that produced total")
     data: List[Notice]
     facets: Optional[Dict[str, Any]] = None
+    next_cursor: Optional[str] = None
 
 class NoticeFilterRequest(BaseModel):
     page: int = Field(1, ge=1)
     page_size: int = Field(20, ge=1, le=100)
+    after: Optional[str] = Field(None, description="Cursor from a previous response's next_cursor (overrides page)")
     sector: str = Field(..., description="The sector name")
+    count_strategy: Optional[CountStrategy] = Field(None, description="'exact', 'capped' (stop at COUNT_CAP) or 'estimated'; default is exact unless the count needs a full scan")
+    fields: Optional[List[str]] = Field(None, description="Notice columns to return (default: all); id and PublishDate are always included, others are left out")
     
     # Common filters
     stock_code: Optional[List[str]] = None
@@ -442,19 +457,25 @@ class GlobalSearchRequest(BaseModel):
     keyword: str = Field(..., min_length=1, description="Search keyword")
     limit: int = Field(20, ge=1, le=100, description="Items per sector")
     page: int = Field(1, ge=1, description="Page number")
+    after: Optional[str] = Field(None, description="Cursor from a previous response's next_cursor (overrides page; not for order_by='company')")
     stock_code: Optional[str] = Field(None, description="Filter by stock code")
     start_date: Optional[str] = Field(None, description="Start date (inclusive)")
     end_date: Optional[str] = Field(None, description="End date (inclusive)")
-    order_by: str = Field("desc", description="Sort order: 'desc' (newest), 'asc' (oldest), 'company' (company aggregation)")
+    order_by: str = Field("desc", description="Sort order: 'desc' (newest), 'asc' (oldest), 'company' (company aggregation), 'relevance' (best match first; page only, no cursor)")
+    per_company_limit: int = Field(20, ge=1, le=1000, description="Newest notices returned per company for order_by='company' (each company's count covers all of its matches)")
     sector: Optional[str] = Field("三市公告", description="Sector name filter")
+    count_strategy: Optional[CountStrategy] = Field(None, description="'exact', 'capped' (stop at COUNT_CAP) or 'estimated'; default is exact unless the count needs a full scan")
+    fields: Optional[List[str]] = Field(None, description="Notice columns to return (default: all); id and PublishDate (plus StockCode and StockTicker for order_by=company) are always included")
 
 class EventListResponse(BaseModel):
     total: int
     data: List[Event]
+    next_cursor: Optional[str] = None
 
 class NewsListResponse(BaseModel):
     total: int
     data: List[News]
+    next_cursor: Optional[str] = None
 
 class InfoSource(BaseModel):
     id: Optional[str] = None # Unique identifier
@@ -0,0 +1,325 @@
+"""
+Notice CSV ingestion helpers used by Database.load_from_directory().
+
+Parts are streamed in fixed-size chunks. Three write paths share the parsing:
+- default: to_sql per chunk (see app/database.py)
+- bulk_load_notice_files(): indexes dropped, journaling off, executemany
+- parallel_load_notice_files(): worker processes parse parts and hand row
+  batches over a bounded queue to the loading process, the only SQLite writer
+
+Every path writes with INSERT ... ON CONFLICT("NaturalKey") DO UPDATE, so
+loading a part twice updates changed rows in place instead of duplicating them.
+
+This module must not import app.database, which imports it; worker processes
+only need the parsing and writing helpers.
+"""
+import multiprocessing as mp
+import os
+import queue
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+from app.dates import add_date_ints
+from app.dictionary import DICTIONARY_COLUMNS
+from app.db import NoticeModel, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS
+
+# Rows read (and inserted) per chunk when streaming notice CSV parts
+NOTICE_CHUNK_SIZE = int(os.environ.get("NOTICE_CHUNK_SIZE", "20000"))
+# Parsed batches allowed in flight per parse worker before workers block
+NOTICE_QUEUE_DEPTH = int(os.environ.get("NOTICE_QUEUE_DEPTH", "2"))
+
+# Natural key: sector plus the first source identifier present, falling back to
+# title/date/code. notice_natural_keys() and natural_key_sql() compute the same
+# value (NULL propagates through || like NaN through pandas string concatenation).
+def natural_key_sql(alias=None):
+    c = (lambda name: f'{alias}."{name}"') if alias else (lambda name: f'"{name}"')
+    return (
+        f"{c('sector')} || '|' || COALESCE({c('DocumentKey')}, {c('Key')}, {c('Url')}, "
+        f"{c('Title')} || '|' || {c('PublishDate')} || '|' || {c('StockCode')})"
+    )
+
+# Kept on conflict: id (favorites point at it), IsFav (set by users), the key itself
+UPSERT_KEEP_COLUMNS = {"id", "IsFav", "NaturalKey"}
+
+def generate_ids(n):
+    """
+    n unique string ids: one uuid4 prefix plus a running suffix, instead of
+    one uuid.uuid4() call per row.
+    """
+    return np.char.add(f"{uuid.uuid4().hex}-", np.arange(n).astype(str))
+
+def notice_natural_keys(df):
+    def col(name):
+        if name in df.columns:
+            return df[name]
+        return pd.Series(np.nan, index=df.index, dtype=object)
+
+    ident = col("Title") + "|" + col("PublishDate") + "|" + col("StockCode")
+    for name in ("Url", "Key", "DocumentKey"):
+        ident = col(name).fillna(ident)
+    return col("sector") + "|" + ident
+
+def normalize_notice_chunk(df):
+    """
+    Vectorized clean-up of one chunk of notice rows: fill missing ids, set the
+    natural key and PublishDateInt, and keep only columns that exist on
+    NoticeModel. NaN is written as NULL.
+    """
+    if 'id' not in df.columns:
+        df['id'] = generate_ids(len(df))
+    else:
+        missing = df['id'].isna()
+        if missing.any():
+            df.loc[missing, 'id'] = generate_ids(int(missing.sum()))
+    df['NaturalKey'] = notice_natural_keys(df)
+    add_date_ints(df, 'notices')
+
+    model_columns = {c.name for c in NoticeModel.__table__.columns}
+    return df[[c for c in df.columns if c in model_columns]]
+
+def iter_notice_chunks(path, chunksize=None):
+    """
+    Stream a notice CSV part as normalized DataFrame chunks, so memory is
+    bounded by the chunk size rather than the file size.
+    """
+    # Every notice column is text; reading as str also keeps codes like 000001
+    # intact and avoids per-chunk dtype guesses disagreeing with each other
+    reader = pd.read_csv(path, dtype=str, chunksize=chunksize or NOTICE_CHUNK_SIZE)
+    for chunk in reader:
+        yield normalize_notice_chunk(chunk)
+
+def notice_chunk_rows(chunk):
+    """
+    Plain tuples for DB-API executemany, with missing values as None.
+    """
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+def notice_upsert_sql(columns):
+    """
+    INSERT for `columns` that updates an existing row with the same NaturalKey,
+    and only when a value actually differs, so unchanged rows are not rewritten
+    (and do not count in the cursor's rowcount). A dictionary-encoded column
+    whose text changes loses its code; sync_notice_codes() sets the new one.
+    """
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    sql = f'INSERT INTO notices ({column_list}) VALUES ({placeholders}) ON CONFLICT("NaturalKey") DO '
+    updated = [c for c in columns if c not in UPSERT_KEEP_COLUMNS]
+    if not updated:
+        return sql + "NOTHING"
+    assignments = ", ".join(
+        [f'"{c}" = excluded."{c}"' for c in updated]
+        + [f'"{DICTIONARY_COLUMNS[c]}" = CASE WHEN notices."{c}" IS excluded."{c}" THEN notices."{DICTIONARY_COLUMNS[c]}" END'
+           for c in updated if c in DICTIONARY_COLUMNS]
+    )
+    unchanged = " AND ".join(f'notices."{c}" IS excluded."{c}"' for c in updated)
+    return sql + f"UPDATE SET {assignments} WHERE NOT ({unchanged})"
+
+def insert_notice_rows(cur, columns, rows):
+    """
+    Upsert rows on a DB-API cursor; returns the number of rows inserted or changed.
+    """
+    cur.executemany(notice_upsert_sql(columns), rows)
+    return cur.rowcount
+
+def upsert_notices_method(pd_table, conn, keys, data_iter):
+    """
+    DataFrame.to_sql(method=...) callable issuing the notice upsert.
+    """
+    return conn.exec_driver_sql(notice_upsert_sql(keys), list(data_iter)).rowcount
+
+def backfill_notice_natural_keys(bind):
+    """
+    Set NaturalKey on rows loaded before the column existed. Rows that would
+    collide with a row already holding the key are duplicates from earlier
+    appending loads; they keep a NULL key and are reported.
+    """
+    with bind.begin() as conn:
+        filled = conn.exec_driver_sql(
+            f"UPDATE OR IGNORE notices SET NaturalKey = {natural_key_sql()} WHERE NaturalKey IS NULL"
+        ).rowcount
+        if filled:
+            print(f"Backfilled NaturalKey on {filled} notices")
+        leftover = conn.exec_driver_sql(
+            f"SELECT count(*) FROM notices WHERE NaturalKey IS NULL AND {natural_key_sql()} IS NOT NULL"
+        ).scalar()
+    if leftover:
+        print(f"{leftover} duplicate notices have no NaturalKey; reload with --model NoticeModel to remove them")
+
+@contextmanager
+def notice_bulk_mode(raw):
+    """
+    Drop the notice secondary indexes (unique ones stay: the upsert needs them)
+    and switch off journaling and fsync on a raw DB-API connection; rebuild the
+    indexes and restore the pragmas on exit.
+    Meant for offline loads: journal_mode=OFF is not safe while other processes
+    write, and a crash leaves the file unusable.
+    """
+    cur = raw.cursor()
+    indexes = cur.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = 'notices' AND sql IS NOT NULL "
+        "AND sql NOT LIKE 'CREATE UNIQUE%'"
+    ).fetchall()
+    try:
+        print(f"Dropping {len(indexes)} notice indexes for bulk load...")
+        for name, _ in indexes:
+            cur.execute(f'DROP INDEX IF EXISTS "{name}"')
+        raw.commit()
+
+        cur.execute("PRAGMA journal_mode = OFF")
+        cur.execute("PRAGMA synchronous = OFF")
+        yield
+    finally:
+        start = time.perf_counter()
+        for name, sql in indexes:
+            cur.execute(sql)
+        raw.commit()
+        print(f"Rebuilt {len(indexes)} notice indexes in {time.perf_counter() - start:.1f}s")
+
+        cur.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cur.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cur.close()
+
+def bulk_load_notice_files(bind, files):
+    """
+    Bulk-load fast path for notice parts: upsert each file with executemany in
+    one transaction inside notice_bulk_mode().
+    Returns {path: rows read} for the files that were loaded.
+    """
+    loaded = {}
+    raw = bind.raw_connection()
+    try:
+        with notice_bulk_mode(raw):
+            cur = raw.cursor()
+            total_rows = 0
+            total_start = time.perf_counter()
+            for f in files:
+                name = os.path.basename(f)
+                start = time.perf_counter()
+                rows = 0
+                changed = 0
+                try:
+                    # One transaction per file
+                    for chunk in iter_notice_chunks(f):
+                        changed += insert_notice_rows(cur, chunk.columns, notice_chunk_rows(chunk))
+                        rows += len(chunk)
+                    raw.commit()
+                except Exception as e:
+                    raw.rollback()
+                    print(f"Error bulk loading {f}: {e}")
+                    continue
+                elapsed = time.perf_counter() - start
+                total_rows += rows
+                loaded[f] = rows
+                print(f"Loaded {rows} notices ({changed} new or changed) from {name} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+
+            insert_elapsed = time.perf_counter() - total_start
+            print(f"Bulk insert: {total_rows} notices in {insert_elapsed:.1f}s ({total_rows / max(insert_elapsed, 1e-9):.0f} rows/s)")
+            cur.close()
+    finally:
+        raw.close()
+    return loaded
+
+def _parse_worker(tasks, batches, chunksize):
+    """
+    Worker process: parse notice parts from `tasks` until a None sentinel and
+    put ("rows", path, columns, rows) batches, then ("done", path, None, error).
+    """
+    while True:
+        path = tasks.get()
+        if path is None:
+            return
+        error = None
+        try:
+            for chunk in iter_notice_chunks(path, chunksize):
+                batches.put(("rows", path, list(chunk.columns), notice_chunk_rows(chunk)))
+        except Exception as e:
+            error = str(e)
+        batches.put(("done", path, None, error))
+
+def parallel_load_notice_files(bind, files, workers, bulk=False):
+    """
+    Producer/consumer notice load: `workers` processes parse parts in parallel
+    and this process, the single SQLite writer, upserts their batches with
+    executemany, one transaction per batch. The batch queue is bounded so
+    parsing cannot run ahead of the disk by more than a few chunks per worker.
+    Returns {path: rows read} for the files loaded without errors.
+    """
+    workers = max(1, min(workers, len(files)))
+    tasks = mp.Queue()
+    batches = mp.Queue(maxsize=workers * NOTICE_QUEUE_DEPTH)
+    for f in files:
+        tasks.put(f)
+    for _ in range(workers):
+        tasks.put(None)
+
+    procs = [
+        mp.Process(target=_parse_worker, args=(tasks, batches, NOTICE_CHUNK_SIZE), daemon=True)
+        for _ in range(workers)
+    ]
+    print(f"Parsing {len(files)} notice parts with {workers} worker processes...")
+    for p in procs:
+        p.start()
+
+    loaded = {}
+    raw = bind.raw_connection()
+    try:
+        with notice_bulk_mode(raw) if bulk else nullcontext():
+            cur = raw.cursor()
+            file_rows = {}
+            file_changed = {}
+            file_start = {}
+            failed = set()
+            total_rows = 0
+            total_start = time.perf_counter()
+            pending = len(files)
+            while pending:
+                try:
+                    kind, path, columns, payload = batches.get(timeout=1)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in procs):
+                        print(f"Parse workers exited with {pending} notice parts unfinished")
+                        break
+                    continue
+
+                name = os.path.basename(path)
+                file_start.setdefault(path, time.perf_counter())
+                if kind == "rows":
+                    try:
+                        changed = insert_notice_rows(cur, columns, payload)
+                        raw.commit()
+                    except Exception as e:
+                        raw.rollback()
+                        failed.add(path)
+                        print(f"Error inserting batch from {name}: {e}")
+                        continue
+                    file_rows[path] = file_rows.get(path, 0) + len(payload)
+                    file_changed[path] = file_changed.get(path, 0) + changed
+                    total_rows += len(payload)
+                else:
+                    pending -= 1
+                    if payload is not None:
+                        failed.add(path)
+                        print(f"Error reading {name}: {payload}")
+                    rows = file_rows.get(path, 0)
+                    if path not in failed:
+                        loaded[path] = rows
+                    elapsed = time.perf_counter() - file_start[path]
+                    print(f"Loaded {rows} notices ({file_changed.get(path, 0)} new or changed) from {name} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+
+            insert_elapsed = time.perf_counter() - total_start
+            print(f"Parallel insert: {total_rows} notices in {insert_elapsed:.1f}s ({total_rows / max(insert_elapsed, 1e-9):.0f} rows/s)")
+            cur.close()
+    finally:
+        raw.close()
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+    return loaded
@@ -0,0 +1,216 @@
+"""
+Filter and facet definitions for POST /notices, shared by the API and the
+`manage.py explain` index advisor.
+"""
+from sqlalchemy import select
+
+from app.dates import date_param
+from app.db import NoticeDictionaryModel, NoticeModel
+from app.dictionary import DICTIONARY_COLUMNS
+from app.fts import has_notice_fts, keyword_condition
+
+SECTOR_FIELD_CONFIG = {
+    "三市公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "新三板公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "港股中文": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}],
+    "港股英文": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}],
+    "美股": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}],
+    "法规库": [{"name": "法规类型", "field": "StockCode"}, {"name": "地域分布", "field": "Province"}, {"name": "发布机构", "field": "Institutions"}],
+    "债券公告": [{"name": "债券名称", "field": "StockCode"}, {"name": "发行人", "field": "Publisher"}, {"name": "市场类型", "field": "MarketType"}, {"name": "债券品种", "field": "Category"}, {"name": "公告类型", "field": "NoticeType"}],
+    "投行业务审核进程": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "公募基金公告": [{"name": "匹配基金", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "基金管理人", "field": "Publisher"}],
+    "科创板公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "辅导信息": [{"name": "公告类型", "field": "NoticeType"}, {"name": "监管机构", "field": "StockCode"}],
+    "投资者互动问答": [{"name": "发布主体", "field": "StockCode"}, {"name": "是否回复", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "政府采购招标": [{"name": "公告类型", "field": "NoticeType"}, {"name": "项目类型", "field": "Category"}, {"name": "招标机构", "field": "StockCode"}, {"name": "地域分布", "field": "Province"}],
+    "招股书比对": [{"name": "发布主体", "field": "StockCode"}],
+    "创业板审核公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "北交所公告": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}],
+    "证券行业监管信息": [{"name": "数据来源", "field": "Source"}, {"name": "监管机构", "field": "StockCode"}, {"name": "监管措施", "field": "Category"}],
+    "科创板反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
+    "上市公司函件问答": [{"name": "发布主体", "field": "StockCode"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}],
+    "综合反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}],
+    "创业板反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
+    "债券反馈问答": [{"name": "发布主体", "field": "StockCode"}],
+    "北交所反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
+    "主板反馈问答": [{"name": "匹配主体", "field": "StockCode"}, {"name": "中介机构类型", "field": "IntermediaryType"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "地域分布", "field": "Province"}, {"name": "中介机构名称", "field": "IntermediaryName"}, {"name": "市场类型", "field": "MarketType"}],
+    "微信搜索": [{"name": "公告类型", "field": "NoticeType"}],
+    "再融资": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}],
+    "并购重组": [{"name": "发布主体", "field": "StockCode"}, {"name": "公告类型", "field": "NoticeType"}, {"name": "行业统计", "field": "Industry"}, {"name": "市场类型", "field": "MarketType"}, {"name": "地域分布", "field": "Province"}]
+}
+
+# Map Config Field -> (Request Field Name, DB Column)
+# Dictionary-encoded fields filter and facet on their code column
+FIELD_MAPPING = {
+    "StockCode": ("stock_code", NoticeModel.StockCode),
+    "NoticeType": ("notice_type", NoticeModel.NoticeTypeId),
+    "Industry": ("industry", NoticeModel.IndustryId),
+    "MarketType": ("market_type", NoticeModel.MarketTypeId),
+    "Province": ("province", NoticeModel.ProvinceId),
+    "Category": ("category", NoticeModel.CategoryId),
+    "Publisher": ("publisher", NoticeModel.Publisher),
+    "Institutions": ("institutions", NoticeModel.Institutions),
+    "Source": ("source", NoticeModel.SourceId),
+    "IntermediaryType": ("intermediary_type", NoticeModel.IntermediaryTypeId),
+    "IntermediaryName": ("intermediary_name", NoticeModel.IntermediaryName),
+}
+
+# Code column name -> dictionary field
+CODE_COLUMNS = {id_column: column for column, id_column in DICTIONARY_COLUMNS.items()}
+
+
+def dictionary_codes(field, values):
+    """Subquery selecting the codes of `values` of a dictionary-encoded column."""
+    return select(NoticeDictionaryModel.code).where(
+        NoticeDictionaryModel.field == field, NoticeDictionaryModel.value.in_(values)
+    )
+
+
+def dictionary_code(field, value):
+    """Scalar subquery for the code of one value (NULL when it never occurs)."""
+    return select(NoticeDictionaryModel.code).where(
+        NoticeDictionaryModel.field == field, NoticeDictionaryModel.value == value
+    ).scalar_subquery()
+
+
+def sector_condition(sector):
+    return NoticeModel.sectorId == dictionary_code("sector", sector)
+
+
+def decode_facet_values(db_session, facet_rows, facet_fields):
+    """
+    Replace the codes in facet results ({facet_key: [(value, label, count)]},
+    as returned by NoticeResultSet.facets()) with their values; only the
+    codes of the returned top values are looked up.
+    """
+    for facet_key, db_col, _ in facet_fields:
+        field = CODE_COLUMNS.get(db_col.key)
+        rows = facet_rows.get(facet_key)
+        if field is None or not rows:
+            continue
+        values = dict(db_session.execute(
+            select(NoticeDictionaryModel.code, NoticeDictionaryModel.value).where(
+                NoticeDictionaryModel.field == field,
+                NoticeDictionaryModel.code.in_([value for value, _, _ in rows])
+            )
+        ).all())
+        facet_rows[facet_key] = [(values.get(value), label, count) for value, label, count in rows]
+    return facet_rows
+
+
+def build_notice_query(db_session, request):
+    """
+    Filtered NoticeModel query for a NoticeFilterRequest (no ordering or pagination).
+    """
+    # Build query
+    query = db_session.query(NoticeModel)
+    
+    # 1. Sector Filter (Mandatory)
+    query = query.filter(sector_condition(request.sector))
+    
+    # 2. Dynamic Field Filtering based on Sector Config
+    valid_fields = SECTOR_FIELD_CONFIG.get(request.sector, [])
+    
+    for field_config in valid_fields:
+        config_field_name = field_config["field"]
+        
+        if config_field_name in FIELD_MAPPING:
+            req_field, db_col = FIELD_MAPPING[config_field_name]
+            coded = db_col.key in CODE_COLUMNS
+            
+            # Get values from request
+            # Include filter
+            include_vals = getattr(request, req_field, None)
+            if include_vals:
+                if coded:
+                    query = query.filter(db_col.in_(dictionary_codes(config_field_name, include_vals)))
+                else:
+                    query = query.filter(db_col.in_(include_vals))
+            
+            # Exclude filter
+            exclude_field = f"{req_field}_exclude"
+            exclude_vals = getattr(request, exclude_field, None)
+            if exclude_vals:
+                if coded:
+                    # NULL NOT IN (...) is never true for a list of strings, but is for an
+                    # empty code subquery (no excluded value occurs): drop NULLs either way
+                    query = query.filter(
+                        db_col.isnot(None), db_col.notin_(dictionary_codes(config_field_name, exclude_vals))
+                    )
+                else:
+                    query = query.filter(db_col.notin_(exclude_vals))
+        
+    # 3. Date Range (Global)
+    if request.start_date and request.end_date:
+        query = query.filter(
+            NoticeModel.PublishDateInt >= date_param(request.start_date),
+            NoticeModel.PublishDateInt <= date_param(request.end_date, end=True)
+        )
+              
+    # Keyword filters go through the FTS5 index when it has been built
+    use_fts = has_notice_fts(db_session)
+
+    def apply_keyword_filter(q, col, search_text, match_mode):
+        if not search_text:
+            return q
+        
+        keywords = search_text.split()
+        condition = keyword_condition(col, keywords, match_mode, use_fts)
+        if condition is None:
+            return q
+        return q.filter(condition)
+
+    # 4. Title Search (Global)
+    if request.title_search_all:
+        query = apply_keyword_filter(query, NoticeModel.Title, request.title_search_all, "all")
+    if request.title_search_any:
+        query = apply_keyword_filter(query, NoticeModel.Title, request.title_search_any, "any")
+    if request.title_search_none:
+        query = apply_keyword_filter(query, NoticeModel.Title, request.title_search_none, "none")
+        
+    # 5. Content Search (Preview) (Global)
+    if request.content_search_all:
+        query = apply_keyword_filter(query, NoticeModel.Preview, request.content_search_all, "all")
+    if request.content_search_any:
+        query = apply_keyword_filter(query, NoticeModel.Preview, request.content_search_any, "any")
+    if request.content_search_none:
+        query = apply_keyword_filter(query, NoticeModel.Preview, request.content_search_none, "none")
+        
+    # 6. AQ Search (List of strings) - Applied to Preview
+    # aq_search_all: Each string in the list must be present in Preview
+    # aq_search_any: At least one string in the list must be present in Preview
+    # aq_search_none: None of the strings in the list should be present in Preview
+    for terms, match_mode in (
+        (request.aq_search_all, "all"),
+        (request.aq_search_any, "any"),
+        (request.aq_search_none, "none"),
+    ):
+        if terms:
+            condition = keyword_condition(NoticeModel.Preview, terms, match_mode, use_fts)
+            if condition is not None:
+                query = query.filter(condition)
+
+    return query
+
+
+def notice_facet_fields(sector):
+    """
+    Facet fields for a sector: list of (facet key, DB column, label column or None).
+    """
+    valid_fields = SECTOR_FIELD_CONFIG.get(sector, [])
+    facet_fields = []
+    for field_config in valid_fields:
+        config_field_name = field_config["field"]
+        
+        if config_field_name not in FIELD_MAPPING:
+            continue
+            
+        _, db_col = FIELD_MAPPING[config_field_name]
+        
+        if config_field_name == "StockCode":
+            facet_key = "publish_entity" if sector != "辅导信息" else "StockCode"
+            facet_fields.append((facet_key, db_col, NoticeModel.StockTicker))
+        else:
+            facet_fields.append((config_field_name, db_col, None))
+
+    return facet_fields
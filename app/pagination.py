@@ -0,0 +1,103 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A cursor is an opaque token holding the sort key of the last row returned:
+(sort column value, rowid). The next page is a range read on an index that ends
+in that sort column (SQLite appends rowid to every index), so each page costs
+O(page_size) instead of O(offset + page_size).
+"""
+import base64
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import literal_column, tuple_
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def rowid_of(model):
+    return literal_column(f"{model.__tablename__}.rowid")
+
+
+def keyset_page(query, model, sort_col, after, limit, descending=True):
+    """
+    Fetch one page of `query` (a query for `model` without ORDER BY/OFFSET)
+    ordered by (sort_col, rowid), starting after the cursor `after`.
+    sort_col may be None to order by rowid only.
+    Returns (rows, next_cursor); next_cursor is None when the page is not full.
+    """
+    rowid = rowid_of(model)
+
+    if sort_col is None:
+        query = query.add_columns(rowid)
+        if after:
+            (last_rowid,) = decode_cursor(after, 1)
+            query = query.filter(rowid < last_rowid if descending else rowid > last_rowid)
+        query = query.order_by(rowid.desc() if descending else rowid.asc())
+        results = query.limit(limit).all()
+        rows = [r[0] for r in results]
+        next_cursor = encode_cursor([results[-1][1]]) if len(results) == limit else None
+        return rows, next_cursor
+
+    # The sort key is selected alongside the row: it need not be one of its fields
+    query = query.add_columns(sort_col, rowid)
+
+    # NULL sort keys sort last descending and first ascending (SQLite). Row-value
+    # comparisons never match NULL, so the NULL block is read as its own range.
+    last = decode_cursor(after, 2) if after else None
+    blocks = ["value", "null"] if descending else ["null", "value"]
+    if last is not None:
+        blocks = blocks[blocks.index("null" if last[0] is None else "value"):]
+
+    results = []
+    for block in blocks:
+        if block == "value":
+            q = query.filter(sort_col.isnot(None))
+            if last is not None and last[0] is not None:
+                key = tuple_(sort_col, rowid)
+                q = q.filter(key < tuple_(*last) if descending else key > tuple_(*last))
+            q = q.order_by(*([sort_col.desc(), rowid.desc()] if descending else [sort_col.asc(), rowid.asc()]))
+        else:
+            q = query.filter(sort_col.is_(None))
+            if last is not None and last[0] is None:
+                q = q.filter(rowid < last[1] if descending else rowid > last[1])
+            q = q.order_by(rowid.desc() if descending else rowid.asc())
+
+        results.extend(q.limit(limit - len(results)).all())
+        if len(results) >= limit:
+            break
+        # The cursor only constrains the block it points into
+        last = None
+
+    rows = [r[0] for r in results]
+    next_cursor = encode_cursor(list(results[-1][1:])) if len(results) == limit else None
+    return rows, next_cursor
+
+
+def offset_page(query, model, sort_col, offset, limit, descending=True):
+    """
+    Page/page_size pagination with the same ordering as keyset_page(), so the
+    returned cursor can be used to continue in keyset mode.
+    """
+    rowid = rowid_of(model)
+    keys = [rowid] if sort_col is None else [sort_col, rowid]
+    order = [key.desc() if descending else key.asc() for key in keys]
+    results = query.add_columns(*keys).order_by(*order).offset(offset).limit(limit).all()
+
+    rows = [r[0] for r in results]
+    next_cursor = encode_cursor(list(results[-1][1:])) if len(results) == limit else None
+    return rows, next_cursor
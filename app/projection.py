@@ -0,0 +1,53 @@
+"""
+Column projection for list endpoints.
+
+Each endpoint has a default column set (the columns its response model reads)
+and accepts `fields` to narrow it. Pages are read as Bundle rows holding only
+those columns instead of full ORM objects, so SQLite skips the large Text
+columns (Preview, Source, balanceSheet, ...) the response does not use and no
+ORM identity-map entries are built. Bundle rows support attribute access, so
+response models still validate them with from_attributes.
+"""
+from fastapi import HTTPException
+from sqlalchemy.orm import Bundle
+
+
+def model_fields(response_model, model):
+    """
+    Response model fields that are columns of `model`, in response model order.
+    """
+    columns = model.__table__.c
+    return [name for name in response_model.model_fields if name in columns]
+
+
+def resolve_fields(requested, default, required=("id",)):
+    """
+    Columns to select: `requested` (a list whose items may themselves be
+    comma-separated) restricted to `default`, or `default` when not given.
+    `required` columns (ids, sort keys) are always included. Unknown names
+    raise 400.
+    """
+    if not requested:
+        return list(default)
+    names = {name.strip() for item in requested for name in item.split(",") if name.strip()}
+    unknown = sorted(names - set(default))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    names.update(required)
+    return [name for name in default if name in names]
+
+
+def projection(model, fields, expressions=None):
+    """
+    Query entity selecting only `fields` of `model`: use with
+    query.with_entities() or db_session.query(). Like a mapped class, a query
+    for it alone returns the rows themselves, not 1-tuples.
+    `expressions` maps field names to SQL expressions to select instead of the
+    column of the same name.
+    """
+    expressions = expressions or {}
+    columns = [
+        expressions[name].label(name) if name in expressions else getattr(model, name)
+        for name in fields
+    ]
+    return Bundle(model.__tablename__, *columns, single_entity=True)
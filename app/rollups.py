@@ -0,0 +1,197 @@
+"""
+Precomputed facet counts for the common POST /notices shape: a sector plus an
+optional date range and no other filter.
+
+`notice_facet_rollups` holds, per (sector, day, facet column, value), the number
+of notices and the max StockTicker label, plus a `*` row per day with the day's
+total. Sectors and dictionary-encoded values are stored as their codes
+(app/dictionary.py). The same counts summed over all days (grain `all`) answer requests
+without a date range. `manage.py load` rebuilds it after notices change. For a request of that
+shape, total, publisher count and facets are sums over rollup rows; only the
+page itself is read from `notices`.
+
+`day` is PublishDateInt's yyyymmdd. A date range whose start is a whole day and
+whose end covers a whole day (date-only start_date/end_date, as most requests
+send) is exactly a range of days; requests with a time of day in their dates
+fall back to the full facet engine.
+"""
+from sqlalchemy import text
+
+from app.dates import DAY_DIVISOR, END_OF_DAY, date_int
+from app.dictionary import DICTIONARY_TABLE
+from app.db import NoticeModel
+from app.facets import FACET_LIMIT
+from app.notice_query import SECTOR_FIELD_CONFIG, FIELD_MAPPING
+from app.pagination import offset_page
+
+NOTICE_ROLLUP_TABLE = "notice_facet_rollups"
+TOTAL_FIELD = "*"
+
+# NoticeFilterRequest fields that filter rows; any of them set rules the rollup out
+ROLLUP_BLOCKING_FILTERS = [req_field for req_field, _ in FIELD_MAPPING.values()] + [
+    f"{req_field}_exclude" for req_field, _ in FIELD_MAPPING.values()
+] + [
+    "title_search_all", "title_search_any", "title_search_none",
+    "content_search_all", "content_search_any", "content_search_none",
+    "aq_search_all", "aq_search_any", "aq_search_none",
+]
+
+ROLLUP_COLUMNS = ["sectorId", "grain", "day", "field", "value", "label", "cnt"]
+
+
+def drop_notice_rollups(bind):
+    """
+    Drop the rollups before notices are modified, so a load that fails midway
+    leaves the API on the exact path instead of stale counts.
+    """
+    with bind.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {NOTICE_ROLLUP_TABLE}"))
+
+
+def build_notice_rollups(bind):
+    """
+    Rebuild the rollup table from notices in one transaction (readers keep the
+    previous table until it commits). Returns the number of rollup rows.
+    """
+    t = NOTICE_ROLLUP_TABLE
+    day = f"PublishDateInt / {DAY_DIVISOR}"
+    sectors_by_column = {}
+    for sector, fields in SECTOR_FIELD_CONFIG.items():
+        for field_config in fields:
+            if field_config["field"] in FIELD_MAPPING:
+                column = FIELD_MAPPING[field_config["field"]][1].key
+                sectors_by_column.setdefault(column, []).append(sector)
+
+    with bind.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {t}"))
+        # `value` has no declared type so facet values keep their stored type
+        conn.execute(text(
+            f"CREATE TABLE {t} (sectorId INTEGER, grain TEXT, day INTEGER, "
+            f"field TEXT, value, label TEXT, cnt INTEGER)"
+        ))
+        conn.execute(text(
+            f"INSERT INTO {t} SELECT sectorId, 'day', {day}, '{TOTAL_FIELD}', NULL, NULL, count(*) "
+            f"FROM notices GROUP BY 1, 3"
+        ))
+        for column, sectors in sectors_by_column.items():
+            label = "max(StockTicker)" if column == "StockCode" else "NULL"
+            params = {f"s{i}": s for i, s in enumerate(sectors)}
+            conn.execute(text(
+                f'INSERT INTO {t} SELECT sectorId, \'day\', {day}, \'{column}\', "{column}", {label}, count(*) '
+                f"FROM notices WHERE sectorId IN (SELECT code FROM {DICTIONARY_TABLE} WHERE field = 'sector' "
+                f"AND value IN ({', '.join(':' + k for k in params)})) GROUP BY 1, 3, 5"
+            ), params)
+        conn.execute(text(
+            f"INSERT INTO {t} SELECT sectorId, 'all', NULL, field, value, max(label), sum(cnt) "
+            f"FROM {t} WHERE grain = 'day' GROUP BY sectorId, field, value"
+        ))
+        # Covering index: rollup reads never touch the table rows
+        conn.execute(text(
+            f"CREATE INDEX ix_{t}_sectorId_grain_field ON {t} (sectorId, grain, field, day, value, label, cnt)"
+        ))
+        return conn.execute(text(f"SELECT count(*) FROM {t}")).scalar()
+
+
+def has_notice_rollups(db_session):
+    """
+    True when the rollup table exists with the current layout (a table built
+    by an older version, keyed on text days or sectors, does not count).
+    """
+    columns = db_session.execute(
+        text("SELECT name FROM pragma_table_info(:name)"), {"name": NOTICE_ROLLUP_TABLE}
+    ).scalars().all()
+    return columns == ROLLUP_COLUMNS
+
+
+def rollup_date_range(request):
+    """
+    (start, end) yyyymmdd days for the rollup day filter, (None, None) when the
+    request has no date filter, or None when its dates cannot be answered from
+    day buckets.
+    """
+    # build_notice_query() only filters on dates when both are given
+    if not (request.start_date and request.end_date):
+        return None, None
+    start, end = date_int(request.start_date), date_int(request.end_date, end=True)
+    if start is None or end is None:
+        return None
+    if start % DAY_DIVISOR != 0 or end % DAY_DIVISOR != END_OF_DAY:
+        return None
+    return start // DAY_DIVISOR, end // DAY_DIVISOR
+
+
+class NoticeRollup:
+    """
+    Same summary()/facets()/page() interface as app.facets.NoticeResultSet,
+    answered from notice_facet_rollups.
+    """
+
+    def __init__(self, db_session, request, query, date_range):
+        self.db_session = db_session
+        self.sector = request.sector
+        self.query = query
+        self.start_date, self.end_date = date_range
+
+    @classmethod
+    def for_request(cls, db_session, request, query):
+        """
+        A NoticeRollup when the request is sector + date range only and the
+        rollups are built, otherwise None.
+        """
+        if any(getattr(request, name, None) for name in ROLLUP_BLOCKING_FILTERS):
+            return None
+        date_range = rollup_date_range(request)
+        if date_range is None or not has_notice_rollups(db_session):
+            return None
+        return cls(db_session, request, query, date_range)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def _where(self, field):
+        sql = (
+            f"sectorId = (SELECT code FROM {DICTIONARY_TABLE} WHERE field = 'sector' AND value = :sector) "
+            f"AND field = :field"
+        )
+        params = {"sector": self.sector, "field": field}
+        if self.start_date is None:
+            sql += " AND grain = 'all'"
+        else:
+            sql += " AND grain = 'day' AND day BETWEEN :start AND :end"
+            params.update(start=self.start_date, end=self.end_date)
+        return sql, params
+
+    def summary(self, distinct_key=None):
+        where, params = self._where(TOTAL_FIELD)
+        total = self.db_session.execute(
+            text(f"SELECT coalesce(sum(cnt), 0) FROM {NOTICE_ROLLUP_TABLE} WHERE {where}"), params
+        ).scalar()
+        if distinct_key is None:
+            return total, None
+        where, params = self._where(distinct_key)
+        distinct, has_null = self.db_session.execute(
+            text(f"SELECT count(DISTINCT value), max(value IS NULL) FROM {NOTICE_ROLLUP_TABLE} WHERE {where}"),
+            params
+        ).one()
+        return total, distinct + (has_null or 0)
+
+    def facets(self, fields, limit=FACET_LIMIT):
+        result = {}
+        for facet_key, col_key, _ in fields:
+            where, params = self._where(col_key)
+            rows = self.db_session.execute(
+                text(
+                    f"SELECT value, max(label), sum(cnt) AS total FROM {NOTICE_ROLLUP_TABLE} "
+                    f"WHERE {where} AND value IS NOT NULL GROUP BY value ORDER BY total DESC LIMIT :limit"
+                ),
+                {**params, "limit": limit}
+            ).all()
+            result[facet_key] = [tuple(r) for r in rows]
+        return result
+
+    def page(self, offset, limit, entity=NoticeModel):
+        query = self.query if entity is NoticeModel else self.query.with_entities(entity)
+        return offset_page(query, NoticeModel, NoticeModel.PublishDateInt, offset, limit)
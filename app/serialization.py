@@ -0,0 +1,143 @@
+"""
+Fast JSON path for list responses.
+
+Routes keep their response_model (so the OpenAPI schema is unchanged), but a
+route wrapped with json_response() or cache.cached_response() can skip Pydantic
+validation: the result (dicts, DB rows, ORM objects or models) is walked once
+along the response model's field layout and dumped with orjson. For data that
+already has the declared types the bytes match Pydantic's dump_json; nothing is
+coerced or validated.
+
+FAST_JSON selects the routes: "all" (default), "none", or a comma-separated
+list of route names (e.g. "notices,ipo_list"). Without orjson installed every
+route uses Pydantic.
+
+With exclude_unset, fields a result does not carry are left out instead of
+dumped as null (Pydantic's exclude_unset): rows projected to the requested
+`fields` (app/projection.py) come out with just those keys.
+"""
+import functools
+import os
+import types
+import typing
+from collections.abc import Mapping
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+FAST_JSON = os.environ.get("FAST_JSON", "all")
+
+
+def fast_json_enabled(name):
+    if orjson is None or FAST_JSON == "none":
+        return False
+    if FAST_JSON == "all":
+        return True
+    return name in {n.strip() for n in FAST_JSON.split(",")}
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _converter(annotation, exclude_unset=False):
+    """
+    Function mapping a value to plain JSON data shaped like `annotation`, or
+    None when the value can be dumped as it is (scalars, Any, Dict[str, Any]).
+    """
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _converter(args[0], exclude_unset) if len(args) == 1 else None
+    if origin is list:
+        inner = _converter(typing.get_args(annotation)[0], exclude_unset)
+        if inner is None:
+            return None
+        return lambda value: [inner(v) if v is not None else None for v in value]
+    if origin is dict:
+        inner = _converter(typing.get_args(annotation)[1], exclude_unset)
+        if inner is None:
+            return None
+        return lambda value: {k: inner(v) if v is not None else None for k, v in value.items()}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model_converter(annotation, exclude_unset)
+    return None
+
+
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=None)
+def _model_converter(model, exclude_unset=False):
+    names = tuple(model.model_fields)
+    nested = {name: conv for name, field in model.model_fields.items()
+              if (conv := _converter(field.annotation, exclude_unset)) is not None}
+
+    def convert(value):
+        if isinstance(value, Row):
+            value = value._asdict()
+        # Already exactly the model's layout (e.g. a projected row): dump as is
+        if not nested and type(value) is dict and tuple(value) == names:
+            return value
+        if exclude_unset:
+            # Only the fields the value carries, like a model's model_fields_set
+            if isinstance(value, BaseModel):
+                present = value.model_fields_set
+                out = {name: getattr(value, name) for name in names if name in present}
+            elif isinstance(value, dict) or isinstance(value, Mapping):
+                out = {name: value[name] for name in names if name in value}
+            else:
+                out = {name: v for name in names if (v := getattr(value, name, _MISSING)) is not _MISSING}
+        # Rows and dicts: a missing key is a missing column (null), like a default
+        elif isinstance(value, dict) or isinstance(value, Mapping):
+            get = value.get
+            out = {name: get(name) for name in names}
+        else:
+            out = {name: getattr(value, name, None) for name in names}
+        for name, conv in nested.items():
+            if out.get(name) is not None:
+                out[name] = conv(out[name])
+        return out
+    return convert
+
+
+def response_serializer(name, response_model, exclude_unset=False):
+    """
+    Function turning a route result into JSON bytes: orjson when enabled for
+    route `name`, otherwise Pydantic validation + dump_json.
+    """
+    if fast_json_enabled(name):
+        convert = _converter(response_model, exclude_unset)
+        if convert is None:
+            return lambda result: orjson.dumps(result, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return lambda result: orjson.dumps(convert(result), default=_default, option=orjson.OPT_NON_STR_KEYS)
+    adapter = TypeAdapter(response_model)
+    return lambda result: adapter.dump_json(
+        adapter.validate_python(result, from_attributes=True), exclude_unset=exclude_unset
+    )
+
+
+def json_response(name, response_model, exclude_unset=False):
+    """
+    Route decorator: serialize the result with the fast path when it is
+    enabled for `name`; otherwise leave the route to FastAPI's response_model
+    (give the route response_model_exclude_unset to match `exclude_unset`).
+    """
+    def decorator(func):
+        if not fast_json_enabled(name):
+            return func
+        serialize = response_serializer(name, response_model, exclude_unset)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return Response(content=serialize(func(*args, **kwargs)), media_type="application/json")
+        return wrapper
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Blue/green database builds for `manage.py load --swap`.
+
+The serving path (DATABASE_PATH, e.g. ./jianweidata.db) becomes a symlink to a
+timestamped build (jianweidata.<ts>.db). A --swap load writes a new build next
+to it: a fresh full load, or a copy of the live file when only one model is
+reloaded or the load is incremental. Once indexes, FTS and ANALYZE are done,
+the symlink is repointed with an atomic rename. The API notices the new target
+(app.db.reopen_if_swapped()) and opens new pools on it; requests already running
+finish on the old file, and no reader ever sees a half-loaded table.
+"""
+import glob
+import os
+import sqlite3
+import time
+
+from app.notice_ingest import natural_key_sql
+
+# Builds kept on disk, the live one included; older ones are deleted after a swap
+SWAP_KEEP = int(os.environ.get("SWAP_KEEP", "2"))
+
+
+def _build_pattern(live_path):
+    root, ext = os.path.splitext(os.path.abspath(live_path))
+    return f"{root}.*{ext}"
+
+
+def new_build_path(live_path):
+    root, ext = os.path.splitext(os.path.abspath(live_path))
+    path = f"{root}.{time.strftime('%Y%m%d%H%M%S')}{ext}"
+    while os.path.exists(path):
+        # Two builds within the same second
+        time.sleep(1)
+        path = f"{root}.{time.strftime('%Y%m%d%H%M%S')}{ext}"
+    return path
+
+
+def copy_live_database(live_path, build_path):
+    """
+    Consistent copy of the live database with the SQLite backup API, which is
+    safe while the API keeps reading and writing it.
+    """
+    src = sqlite3.connect(f"file:{os.path.realpath(live_path)}?mode=ro", uri=True)
+    dst = sqlite3.connect(build_path)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def carry_favorites(live_path, build_path):
+    """
+    Replace the build's favorites with the live ones, re-pointed by NaturalKey
+    at the build's notice ids (a fresh load gives notices new ids). Favorites
+    toggled between this call and the swap are lost.
+    """
+    if not os.path.exists(live_path):
+        return
+    conn = sqlite3.connect(f"file:{build_path}", uri=True)
+    try:
+        conn.execute("ATTACH DATABASE ? AS live", (f"file:{os.path.realpath(live_path)}?mode=ro",))
+        tables = conn.execute(
+            "SELECT count(*) FROM live.sqlite_master WHERE type = 'table' AND name IN ('notices', 'favorite_notices')"
+        ).fetchone()[0]
+        if tables < 2:
+            return
+        with conn:
+            conn.execute("DELETE FROM favorite_notices")
+            conn.execute(f"""
+                INSERT INTO favorite_notices (id, notice_id, user_id, create_time)
+                SELECT f.id, n.id, f.user_id, f.create_time
+                FROM live.favorite_notices f
+                JOIN live.notices o ON o.id = f.notice_id
+                JOIN notices n ON n.NaturalKey = {natural_key_sql('o')}
+            """)
+            conn.execute("UPDATE notices SET IsFav = '1' WHERE id IN (SELECT notice_id FROM favorite_notices)")
+            conn.execute(
+                "UPDATE notices SET IsFav = '0' WHERE IsFav = '1' "
+                "AND id NOT IN (SELECT notice_id FROM favorite_notices)"
+            )
+        carried = conn.execute("SELECT count(*) FROM favorite_notices").fetchone()[0]
+        total = conn.execute("SELECT count(*) FROM live.favorite_notices").fetchone()[0]
+        print(f"Carried {carried} of {total} favorites into the new build")
+    finally:
+        conn.close()
+
+
+def prune_builds(live_path):
+    current = os.path.realpath(live_path)
+    builds = sorted(p for p in glob.glob(_build_pattern(live_path)) if os.path.realpath(p) != current)
+    for path in builds[:max(0, len(builds) - (SWAP_KEEP - 1))]:
+        # Requests still reading an old build keep their open file handles
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        print(f"Removed old build {os.path.basename(path)}")
+
+
+def publish_build(live_path, build_path):
+    """
+    Carry favorites over, checkpoint the build and atomically point live_path
+    at it. A regular file at live_path (before the first swap) is replaced.
+    """
+    carry_favorites(live_path, build_path)
+
+    conn = sqlite3.connect(build_path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+    live_path = os.path.abspath(live_path)
+    tmp_link = f"{live_path}.swap-{os.getpid()}"
+    os.symlink(os.path.basename(build_path), tmp_link)
+    # rename() over the old path is atomic: openers see the old or the new build
+    os.replace(tmp_link, live_path)
+    print(f"Swapped {os.path.basename(live_path)} -> {os.path.basename(build_path)}")
+
+    prune_builds(live_path)
@@ -0,0 +1,113 @@
+"""
+POST /notices filter + count + facets + page: the SQL engine (app/facets.py,
+exact counts) vs the columnar snapshot (app/columnar.py).
+
+Runs a few filter shapes for one sector against DATABASE_PATH:
+
+    DATABASE_PATH=./jianweidata.db python bench/bench_columnar.py --sector 三市公告 --repeat 20
+
+Prints the snapshot build time and size, then the median time per case and
+engine, and checks both engines return the same total, facets and page.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import func
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import NOTICE_FIELDS  # noqa: E402
+from app.columnar import ColumnarResultSet, NoticeSnapshot  # noqa: E402
+from app.db import NoticeModel, ReadSessionLocal  # noqa: E402
+from app.facets import NoticeResultSet  # noqa: E402
+from app.models import NoticeFilterRequest  # noqa: E402
+from app.notice_query import build_notice_query, decode_facet_values, notice_facet_fields  # noqa: E402
+from app.projection import projection  # noqa: E402
+
+
+def top_values(session, sector, column, n):
+    rows = session.query(column).filter(NoticeModel.sector == sector, column.isnot(None)).group_by(column).order_by(
+        func.count().desc()
+    ).limit(n).all()
+    return [r[0] for r in rows]
+
+
+def cases(session, sector):
+    notice_types = top_values(session, sector, NoticeModel.NoticeType, 3)
+    provinces = top_values(session, sector, NoticeModel.Province, 2)
+    codes = top_values(session, sector, NoticeModel.StockCode, 5)
+    return [
+        ("sector only", {}),
+        ("notice_type IN", {"notice_type": notice_types[:2]}),
+        ("province exclude", {"province_exclude": provinces[:1]}),
+        ("stock_code IN", {"stock_code": codes}),
+        ("date range", {"start_date": "2022-01-01", "end_date": "2023-12-31"}),
+        ("IN + exclude + dates", {
+            "notice_type": notice_types, "province_exclude": provinces[:1],
+            "start_date": "2021-01-01", "end_date": "2024-12-31",
+        }),
+    ]
+
+
+def run(session, request, result_set, entity):
+    """What get_notices reads from a result set: total, distinct entities, page, facets."""
+    facet_fields = notice_facet_fields(request.sector)
+    with result_set:
+        summary = result_set.summary("StockCode")
+        rows, cursor = result_set.page(0, request.page_size, entity)
+        facets = result_set.facets([
+            (key, col.key, label.key if label is not None else None) for key, col, label in facet_fields
+        ])
+        facets = decode_facet_values(session, facets, facet_fields)
+    return summary, [r.id for r in rows], cursor, facets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL vs columnar POST /notices engine")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sector", default="三市公告")
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    session = ReadSessionLocal()
+    try:
+        start = time.perf_counter()
+        snapshot = NoticeSnapshot(session)
+        print(f"snapshot: {len(snapshot.rowids)} notices, {snapshot.nbytes / 1024 / 1024:.1f} MiB, "
+              f"built in {time.perf_counter() - start:.2f}s\n")
+
+        entity = projection(NoticeModel, NOTICE_FIELDS)
+        print(f"{'case':<22} {'rows':>7} {'sql':>9} {'columnar':>9} {'speedup':>8}  same")
+        for name, filters in cases(session, args.sector):
+            request = NoticeFilterRequest(sector=args.sector, page_size=args.page_size, **filters)
+            query = build_notice_query(session, request)
+            carried = [c for f in notice_facet_fields(request.sector) for c in f[1:] if c is not None]
+
+            def sql_path():
+                return run(session, request, NoticeResultSet(session, query, carried), entity)
+
+            def columnar_path():
+                return run(session, request, ColumnarResultSet(snapshot, session, request), entity)
+
+            sql_result = sql_path()
+            same = sql_result == columnar_path()
+            times = {}
+            for engine, path in (("sql", sql_path), ("columnar", columnar_path)):
+                samples = []
+                for _ in range(args.repeat):
+                    session.expunge_all()
+                    t0 = time.perf_counter()
+                    path()
+                    samples.append(time.perf_counter() - t0)
+                times[engine] = statistics.median(samples)
+            print(f"{name:<22} {sql_result[0][0]:>7} {times['sql'] * 1000:7.2f}ms {times['columnar'] * 1000:7.2f}ms "
+                  f"{times['sql'] / max(times['columnar'], 1e-9):7.1f}x  {same}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
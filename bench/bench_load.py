@@ -0,0 +1,61 @@
+"""
+Notice load timing: default to_sql path vs `manage.py load --bulk`, and
+optionally `--bulk --workers N` (parallel parsing).
+
+Each mode loads the same notice CSVs into its own throwaway database:
+
+    python bench/bench_load.py --dir ./data --workdir /tmp/bench_load --workers 4
+
+Prints wall time per mode and the resulting row count.
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_load(data_dir, db_path, bulk, workers=1):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    cmd = [sys.executable, os.path.join(BASE_DIR, "manage.py"), "load", "--dir", data_dir, "--model", "NoticeModel"]
+    if bulk:
+        cmd.append("--bulk")
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    env = dict(os.environ, DATABASE_PATH=db_path)
+    start = time.perf_counter()
+    subprocess.run(cmd, env=env, cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT count(*) FROM notices").fetchone()[0]
+    return elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare notice load paths")
+    parser.add_argument("--dir", default=os.path.join(BASE_DIR, "data"), help="Data directory with notice/ CSVs")
+    parser.add_argument("--workdir", default="/tmp/bench_load", help="Where the throwaway databases go")
+    parser.add_argument("--workers", type=int, default=1, help="Also time --bulk --workers N when N > 1")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = {}
+    modes = [("to_sql", False, 1), ("bulk", True, 1)]
+    if args.workers > 1:
+        modes.append((f"bulk+{args.workers}w", True, args.workers))
+    for label, bulk, workers in modes:
+        db_path = os.path.join(args.workdir, f"{label}.db")
+        elapsed, rows = run_load(os.path.abspath(args.dir), db_path, bulk, workers)
+        results[label] = elapsed
+        print(f"{label:<10} {elapsed:8.1f}s  rows={rows}  ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+    for label in list(results)[1:]:
+        print(f"{label} speedup: {results['to_sql'] / max(results[label], 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
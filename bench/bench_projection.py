@@ -0,0 +1,100 @@
+"""
+Per-endpoint cost of loading full ORM rows vs the projected column sets used by
+the list endpoints (app/projection.py).
+
+Each case runs the endpoint's page query both ways against DATABASE_PATH and
+builds the response items from the rows:
+
+    DATABASE_PATH=./jianweidata.db python bench/bench_projection.py --repeat 20
+
+Prints the median time per case and the speedup.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import NOTICE_FIELDS, IPO_DATA_FIELDS, IPO_RANK_FIELDS, IPO_REVIEW_FIELDS  # noqa: E402
+from app.db import ReadSessionLocal, NoticeModel, IPODataModel, IPORankModel, IPOReviewModel  # noqa: E402
+from app.models import Notice, IPODataBasic, IPORankBasic, IPOReviewBasic  # noqa: E402
+from app.notice_query import sector_condition  # noqa: E402
+from app.projection import projection  # noqa: E402
+
+
+def notice_items(rows):
+    return [Notice.model_validate(r, from_attributes=True) for r in rows]
+
+
+def notice_items_projected(rows):
+    return [Notice.model_validate(r._asdict()) for r in rows]
+
+
+def search_items_full(rows):
+    return [{k: v for k, v in r.__dict__.items() if not k.startswith('_')} for r in rows]
+
+
+def search_items_projected(rows):
+    return [r._asdict() for r in rows]
+
+
+def basic_items(basic):
+    return lambda rows: [basic(**{f: getattr(r, f) for f in basic.model_fields}) for r in rows]
+
+
+def cases(session, page_size, sector):
+    notices = session.query(NoticeModel).filter(sector_condition(sector)).order_by(
+        NoticeModel.PublishDateInt.desc()
+    ).limit(page_size)
+    ipo = session.query(IPODataModel).filter(IPODataModel.category == "首次公开发行")
+    rank = session.query(IPORankModel).limit(page_size)
+    review = session.query(IPOReviewModel).limit(page_size)
+    return [
+        ("POST /notices", notices, notices.with_entities(projection(NoticeModel, NOTICE_FIELDS)),
+         notice_items, notice_items_projected),
+        ("POST /notices fields=Title", notices,
+         notices.with_entities(projection(NoticeModel, ["id", "PublishDate", "Title"])),
+         notice_items, notice_items_projected),
+        ("POST /notices/search", notices, notices.with_entities(projection(NoticeModel, NOTICE_FIELDS)),
+         search_items_full, search_items_projected),
+        ("GET /ipo/list", ipo, ipo.with_entities(projection(IPODataModel, IPO_DATA_FIELDS)),
+         basic_items(IPODataBasic), basic_items(IPODataBasic)),
+        ("GET /ipo/rank/list", rank, rank.with_entities(projection(IPORankModel, IPO_RANK_FIELDS)),
+         basic_items(IPORankBasic), basic_items(IPORankBasic)),
+        ("GET /ipo/review/list", review, review.with_entities(projection(IPOReviewModel, IPO_REVIEW_FIELDS)),
+         basic_items(IPOReviewBasic), basic_items(IPOReviewBasic)),
+    ]
+
+
+def timed(session, query, build, repeat):
+    times = []
+    for _ in range(repeat):
+        session.expunge_all()
+        start = time.perf_counter()
+        build(query.all())
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full ORM rows vs projected columns per list endpoint")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--sector", default="三市公告")
+    args = parser.parse_args()
+
+    session = ReadSessionLocal()
+    try:
+        print(f"{'endpoint':<28} {'full':>9} {'projected':>10} {'speedup':>8}")
+        for name, full, projected, build_full, build_projected in cases(session, args.page_size, args.sector):
+            t_full = timed(session, full, build_full, args.repeat)
+            t_proj = timed(session, projected, build_projected, args.repeat)
+            print(f"{name:<28} {t_full * 1000:7.2f}ms {t_proj * 1000:8.2f}ms {t_full / max(t_proj, 1e-9):7.1f}x")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Response serialization micro-benchmark: Pydantic validation + dump_json (the
+response_model path) vs the orjson fast path in app/serialization.py.
+
+Payloads are synthetic, shaped like the API's list responses: a NoticeListResponse
+page of DB row mappings and a list of IPOData rows, every field filled:
+
+    python bench/bench_serialization.py --rows 100 --repeat 200
+
+Prints the median time per payload and path, and checks both produce the same bytes.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import typing
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.models import IPOData, NoticeListResponse  # noqa: E402
+from app import serialization  # noqa: E402
+
+
+def sample_value(annotation, i):
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    kind = args[0] if args else annotation
+    if kind is int:
+        return i
+    if kind is float:
+        return i * 1.5
+    if kind is str:
+        return f"示例文本-{i}-" + "x" * 20
+    return [{"date": "2024-01-01", "status": "已受理"}, {"date": "2024-03-01", "status": "已问询"}]
+
+
+def sample_rows(model, n):
+    return [
+        {name: sample_value(field.annotation, i) for name, field in model.model_fields.items()}
+        for i in range(n)
+    ]
+
+
+def payloads(rows):
+    notice_model = NoticeListResponse.model_fields["data"].annotation.__args__[0]
+    notice_page = {
+        "total": 123456,
+        "total_display": "123456",
+        "count_strategy": "exact",
+        "data": sample_rows(notice_model, rows),
+        "facets": {"NoticeType": [{"name": f"类型{i}", "count": i} for i in range(50)]},
+        "next_cursor": "WyIyMDI0LTAxLTAxIiwxMjNd",
+    }
+    return [
+        ("NoticeListResponse", NoticeListResponse, notice_page),
+        ("List[IPOData]", List[IPOData], sample_rows(IPOData, rows)),
+    ]
+
+
+def median_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pydantic vs orjson response serialization")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if serialization.orjson is None:
+        print("orjson is not installed; only the Pydantic path is available")
+        return
+
+    print(f"{'payload':<20} {'pydantic':>10} {'orjson':>9} {'speedup':>8}  same bytes")
+    for name, model, payload in payloads(args.rows):
+        adapter = TypeAdapter(model)
+        convert = serialization._converter(model)
+        pydantic_path = lambda: adapter.dump_json(adapter.validate_python(payload, from_attributes=True))  # noqa: E731
+        fast_path = lambda: serialization.orjson.dumps(  # noqa: E731
+            convert(payload), default=serialization._default, option=serialization.orjson.OPT_NON_STR_KEYS
+        )
+        same = pydantic_path() == fast_path()
+        t_pydantic = median_time(pydantic_path, args.repeat)
+        t_fast = median_time(fast_path, args.repeat)
+        print(f"{name:<20} {t_pydantic * 1000:8.2f}ms {t_fast * 1000:7.2f}ms {t_pydantic / t_fast:7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
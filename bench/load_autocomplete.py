@@ -0,0 +1,100 @@
+"""
+Load test: /companies/search latency while heavy /notices queries run in parallel.
+
+Start the server first (python manage.py start), then:
+
+    python bench/load_autocomplete.py --url http://127.0.0.1:8000 --heavy 8 --requests 300
+
+Prints p50/p95/p99 autocomplete latency with and without background load.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+HEAVY_PAYLOADS = [
+    {"sector": "三市公告", "page": 50, "content_search_any": "公告 报告"},
+    {"sector": "科创板反馈问答", "content_search_all": "问询 回复"},
+    {"sector": "三市公告", "start_date": "2000-01-01", "end_date": "2099-12-31"},
+]
+KEYWORDS = ["0", "00", "000", "6000", "银行", "平安", "科技", "300"]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def heavy_worker(base_url, stop, counter):
+    i = 0
+    while not stop.is_set():
+        body = json.dumps(HEAVY_PAYLOADS[i % len(HEAVY_PAYLOADS)]).encode("utf-8")
+        req = urllib.request.Request(
+            f"{base_url}/notices", data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            urllib.request.urlopen(req, timeout=120).read()
+            counter.append(1)
+        except Exception as e:
+            print(f"heavy request failed: {e}")
+        i += 1
+
+
+def measure_autocomplete(base_url, n):
+    latencies = []
+    for i in range(n):
+        kw = urllib.parse.quote(KEYWORDS[i % len(KEYWORDS)])
+        start = time.perf_counter()
+        urllib.request.urlopen(f"{base_url}/companies/search?keyword={kw}", timeout=60).read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        f"{label:<24} n={len(latencies):<5} "
+        f"p50={percentile(latencies, 50):8.2f}ms "
+        f"p95={percentile(latencies, 95):8.2f}ms "
+        f"p99={percentile(latencies, 99):8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autocomplete latency under notice load")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--heavy", type=int, default=8, help="Concurrent heavy /notices clients")
+    parser.add_argument("--requests", type=int, default=300, help="Autocomplete requests per phase")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+
+    report("idle", measure_autocomplete(base_url, args.requests))
+
+    stop = threading.Event()
+    completed = []
+    threads = [
+        threading.Thread(target=heavy_worker, args=(base_url, stop, completed), daemon=True)
+        for _ in range(args.heavy)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(1)
+
+    start = time.perf_counter()
+    latencies = measure_autocomplete(base_url, args.requests)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join()
+
+    report(f"with {args.heavy} heavy", latencies)
+    print(f"heavy /notices completed: {len(completed)} ({len(completed) / elapsed:.1f}/s)")
+
+
+if __name__ == "__main__":
+    main()
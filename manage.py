@@ -1,9 +1,8 @@
 import argparse
 import os
 import uvicorn
-from app.database import db
 
-def load_data_only(directory, model=None):
+def load_data_only(directory, model=None, bulk=False, workers=1, incremental=False, swap=False):
     """
     Test loading data from the directory without starting the web server.
     Useful for verifying data integrity and loading logic.
@@ -13,8 +12,34 @@ def load_data_only(directory, model=None):
         print(f"Error: Directory {directory} does not exist.")
         return
         
+    # Imported here: notice parse workers re-import this module
+    from app.database import db
+    from app.db import DATABASE_PATH, init_db
+
+    build_path = None
+    if swap:
+        # Build into a new file next to the serving one; the API keeps serving
+        # the old file until publish_build() repoints DATABASE_PATH
+        from app.db import open_database
+        from app.swap import new_build_path, copy_live_database, publish_build
+
+        build_path = new_build_path(DATABASE_PATH)
+        if (model or incremental) and os.path.exists(DATABASE_PATH):
+            print(f"Copying live database to {build_path}...")
+            copy_live_database(DATABASE_PATH, build_path)
+        print(f"Building into {build_path}")
+        open_database(build_path)
+    # Schema migration runs on the file being loaded only: with --swap the
+    # serving database is left untouched
+    init_db()
+
     try:
-        db.load_from_directory(directory, model_name=model)
+        db.load_from_directory(directory, model_name=model, bulk=bulk, workers=workers, incremental=incremental)
+        if swap:
+            if not db.loaded:
+                print(f"--- Data Load Failed, serving database unchanged (build left at {build_path}) ---")
+                return
+            publish_build(DATABASE_PATH, build_path)
         print("--- Data Load Successful ---")
         # Since we moved to database queries, these attributes no longer exist on the db object.
         # We can just print a success message.
@@ -22,6 +47,38 @@ def load_data_only(directory, model=None):
         print(f"--- Data Load Failed ---")
         print(e)
 
+def migrate_database():
+    """
+    Create missing tables, columns and indexes on DATABASE_PATH and fill the
+    derived columns. Every load does this on the file it writes; run it after
+    upgrading when the API serves a database that was loaded before.
+    """
+    from app.db import DATABASE_PATH, init_db
+
+    print(f"--- Migrating {DATABASE_PATH} ---")
+    init_db()
+    print("--- Migration Done ---")
+
+def explain_queries(payloads_file=None):
+    """
+    Run EXPLAIN QUERY PLAN over representative /notices payloads and flag
+    full scans and temp B-tree sorts.
+    """
+    import json
+    from app.advisor import run_index_advisor
+    from app.db import ReadSessionLocal
+
+    payloads = None
+    if payloads_file:
+        with open(payloads_file, encoding="utf-8") as f:
+            payloads = json.load(f)
+
+    session = ReadSessionLocal()
+    try:
+        run_index_advisor(session, payloads)
+    finally:
+        session.close()
+
 def start_server(directory, host, port, reload):
     """
     Start the FastAPI server with the specified data directory.
@@ -44,6 +101,19 @@ def main():
     load_parser = subparsers.add_parser("load", help="Load data from directory into database")
     load_parser.add_argument("--dir", default="/Users/bytedance/pycodes/jianweidata/data", help="Data directory path")
     load_parser.add_argument("--model", default=None, help="Specific model to load (e.g., CompanyModel, IPODataModel). Clears old data for this model.")
+    load_parser.add_argument("--bulk", action="store_true", help="Bulk-load notices: drop indexes, journaling off, one transaction per file, rebuild indexes. Run with the API stopped.")
+    load_parser.add_argument("--workers", type=int, default=1, help="Processes parsing notice CSV parts in parallel; this process remains the only SQLite writer.")
+    load_parser.add_argument("--incremental", action="store_true", help="Skip source files unchanged since the last load (load_manifest) and upsert notices by natural key instead of clearing or appending.")
+    load_parser.add_argument("--swap", action="store_true", help="Build into a new jianweidata.<ts>.db and atomically repoint DATABASE_PATH to it when done; the running API switches over without downtime.")
+
+    # Command: migrate
+    # Usage: python manage.py migrate
+    subparsers.add_parser("migrate", help="Create missing tables, columns and indexes (run after upgrading)")
+
+    # Command: explain
+    # Usage: python manage.py explain [--payloads payloads.json]
+    explain_parser = subparsers.add_parser("explain", help="Show query plans for representative /notices requests")
+    explain_parser.add_argument("--payloads", default=None, help="JSON file with a list of NoticeFilterRequest payloads (defaults to the built-in library)")
 
     # Command: start
     # Usage: python manage.py start --dir /path/to/data --port 8000
@@ -56,7 +126,11 @@ def main():
     args = parser.parse_args()
 
     if args.command == "load":
-        load_data_only(args.dir, args.model)
+        load_data_only(args.dir, args.model, args.bulk, args.workers, args.incremental, args.swap)
+    elif args.command == "migrate":
+        migrate_database()
+    elif args.command == "explain":
+        explain_queries(args.payloads)
     elif args.command == "start":
         start_server(args.dir, args.host, args.port, args.reload)
     else:
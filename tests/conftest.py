@@ -0,0 +1,144 @@
+"""
+Shared fixtures: a small synthetic data directory and a database loaded from
+it with `manage.py load`'s loader, opened in place of DATABASE_PATH.
+"""
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+
+# app.db opens DATABASE_PATH on import: point it at a scratch file first
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="jianwei-tests-"), "import.db")
+os.environ["DATA_VERSION_CHECK_INTERVAL"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+SECTORS = ["三市公告", "科创板反馈问答", "债券公告"]
+NOTICE_TYPES = ["年度报告", "临时公告", "董事会决议", "问询函回复"]
+INDUSTRIES = ["银行", "证券", "医药", ""]  # "" is NULL after loading
+PROVINCES = ["北京", "上海", "广东", ""]
+COMPANIES = [("%06d" % i, t) for i, t in enumerate(["平安银行", "万科A", "国农科技", "世纪星源"] * 5, 1)]
+NOTICE_COLUMNS = [
+    "Title", "Preview", "PublishDate", "StockCode", "StockTicker", "NoticeType", "Industry", "MarketType",
+    "Province", "Category", "Publisher", "Institutions", "Source", "IntermediaryType", "IntermediaryName",
+    "sector", "DocumentKey", "Key", "IsFav", "Url",
+]
+SECTOR_SOURCES = 4
+NEWS_PER_SOURCE = 3
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_notice_part(directory, part, rows, first_key=0, seed=0):
+    rng = random.Random(seed)
+    notices = []
+    for i in range(first_key, first_key + rows):
+        code, ticker = rng.choice(COMPANIES)
+        if i % 17 == 0:
+            code, ticker = "", ""  # notices without a company
+        date = f"20{rng.randint(20, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        if i % 23 == 0:
+            date = ""  # no date: sorts after every dated notice
+        elif i % 5 == 0:
+            date = "2024-06-30"  # many notices on one day: ties broken by rowid
+        notices.append([
+            f"{ticker}关于收购事项的公告{i}", "收购 重组 分红", date, code, ticker,
+            rng.choice(NOTICE_TYPES), rng.choice(INDUSTRIES), rng.choice(["主板", "创业板"]),
+            rng.choice(PROVINCES), rng.choice(["A", "B"]), rng.choice(["P1", "P2"]), "",
+            rng.choice(["S1", "S2"]), rng.choice(["保荐", "律所"]), rng.choice(["中信", "华泰"]),
+            rng.choice(SECTORS), f"DK{i}", f"K{i}", "0", f"http://example.com/{i}",
+        ])
+    write_csv(os.path.join(directory, "notice", f"notice_all_part_{part}.csv"), NOTICE_COLUMNS, notices)
+
+
+def write_dataset(directory):
+    os.makedirs(os.path.join(directory, "notice"), exist_ok=True)
+    write_notice_part(directory, 0, 300, 0, seed=1)
+    write_notice_part(directory, 1, 300, 300, seed=2)
+    write_csv(os.path.join(directory, "company.csv"), ["stockCode", "Ticker", "Market", "listDate"],
+              [[code, ticker, 1, "2010-01-01"] for code, ticker in COMPANIES])
+    write_csv(os.path.join(directory, "event.csv"), ["event_id", "title", "heat", "market"],
+              [[f"E{i}", f"事件{i}", i, "A股"] for i in range(10)])
+    write_csv(os.path.join(directory, "news.csv"), ["event_id", "title", "time", "source"],
+              [[f"E{i % 10}", f"新闻{i}", f"2024-01-{1 + i % 28:02d}", "src"] for i in range(30)])
+    write_csv(os.path.join(directory, "ipo_data.csv"), ["Issuer", "LatestDate", "ListingMarket", "Status", "category", "timeline"], [
+        [f"发行人{i}", f"2024-03-{1 + i % 28:02d}", "上交所", "已受理", "首次公开发行",
+         json.dumps([{"Title": "受理", "PublishDate": "2024-01-02"}], ensure_ascii=False)]
+        for i in range(30)
+    ])
+    write_csv(os.path.join(directory, "ipo_rank.csv"), ["Entity", "Rank", "ListingMarket", "category", "AcceptDate"],
+              [[f"主体{i}", i, "深交所", "首次公开发行", f"2023-{1 + i % 12:02d}-01"] for i in range(30)])
+    write_csv(os.path.join(directory, "ipo_review.csv"), ["Entity", "Rank", "LastUpdateDate"],
+              [[f"审核{i}", i, f"2024-{1 + i % 12:02d}-03"] for i in range(30)])
+    write_csv(os.path.join(directory, "timeline_details.csv"), ["stockCode", "title", "publishDate", "category_name"],
+              [["600519", f"时间轴{i}", f"2023-{1 + i % 6:02d}-01", "定期报告"] for i in range(40)])
+    write_csv(os.path.join(directory, "sector_info.csv"), ["Sector", "SourceName", "SourceUrl", "News"], [
+        [SECTORS[i % len(SECTORS)], f"来源{i}", f"http://example.com/s/{i}", json.dumps(
+            [{"Title": f"资讯{i}-{j}", "PublishDate": f"2024-02-{10 + j}", "Url": "u"} for j in range(NEWS_PER_SOURCE)],
+            ensure_ascii=False
+        )]
+        for i in range(SECTOR_SOURCES)
+    ])
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / "data"
+    write_dataset(str(directory))
+    return str(directory)
+
+
+@pytest.fixture
+def database(tmp_path, data_dir, monkeypatch):
+    """A loaded database file, opened as the app's database."""
+    import app.db
+    from app.cache import result_cache
+    from app.database import Database
+
+    path = str(tmp_path / "jianweidata.db")
+    monkeypatch.setattr(app.db, "DATABASE_PATH", path)
+    app.db.open_database(path)
+    app.db.init_db()
+    loader = Database()
+    loader.load_from_directory(data_dir, incremental=True)
+    assert loader.loaded
+    result_cache.invalidate()
+    yield path
+    result_cache.invalidate()
+    app.db.engine.dispose()
+    app.db.read_engine.dispose()
+
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.api import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Switch get_notices between the SQL and the columnar engine."""
+    from app import columnar
+    from app.db import ReadSessionLocal
+
+    def use(name):
+        monkeypatch.setattr(columnar, "NOTICE_FACET_ENGINE", name)
+        if name == "columnar":
+            session = ReadSessionLocal()
+            try:
+                columnar.notice_columns.build(session)
+            finally:
+                session.close()
+    yield use
+    columnar.notice_columns.snapshot = None
@@ -0,0 +1,45 @@
+import pytest
+
+from app import api, counting
+from app.cache import result_cache
+
+BODY = {"sector": "三市公告", "industry": ["医药", "银行"], "page_size": 5}
+
+
+def notices(client, **body):
+    result_cache.invalidate()
+    response = client.post("/notices", json={**BODY, **body})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("count_strategy", ["capped", "estimated"])
+def test_facets_do_not_depend_on_count_strategy(client, monkeypatch, count_strategy):
+    expected = notices(client, count_strategy="exact")
+    monkeypatch.setattr(api, "COUNT_CAP", 5)
+    assert expected["total"] > 5
+
+    result = notices(client, count_strategy=count_strategy)
+    # Only the total is capped or estimated; facets describe every matching row
+    assert result["facets"] == expected["facets"]
+    assert result["data"] == expected["data"]
+    if count_strategy == "capped":
+        assert (result["total"], result["total_display"]) == (5, "5+")
+
+
+def test_default_capped_count_keeps_exact_facets(client, monkeypatch):
+    expected = notices(client, count_strategy="exact")
+    monkeypatch.setattr(api, "COUNT_CAP", 5)
+    # As for a plan that reads every notice of the sector
+    monkeypatch.setattr(counting, "count_needs_scan", lambda db_session, query: True)
+    result = notices(client)
+    assert result["count_strategy"] == "capped"
+    assert result["facets"] == expected["facets"]
+
+
+def test_capped_pages_past_the_cap(client, monkeypatch):
+    expected = notices(client, count_strategy="exact", page=3)
+    monkeypatch.setattr(api, "COUNT_CAP", 5)
+    result = notices(client, count_strategy="capped", page=3)
+    assert result["data"] == expected["data"]
+    assert result["next_cursor"] == expected["next_cursor"]
@@ -0,0 +1,49 @@
+from app import columnar
+from app.autocomplete import company_index
+from app.cache import result_cache
+from app.db import ReadSessionLocal
+
+
+def first_notice(client):
+    return client.post("/notices", json={"sector": "三市公告", "page_size": 1}).json()["data"][0]
+
+
+def test_toggle_refreshes_cached_notices(client):
+    notice = first_notice(client)
+    assert notice["IsFav"] == "0"
+    assert first_notice(client) == notice  # served from the cache
+
+    results = client.post("/notices/favorite", json={"notice_ids": [notice["id"]]}).json()["results"]
+    assert results[0]["status"] == "added"
+    assert first_notice(client)["IsFav"] == "1"
+
+    client.post("/notices/favorite", json={"notice_ids": [notice["id"]]})
+    assert first_notice(client)["IsFav"] == "0"
+
+
+def test_toggle_keeps_unrelated_caches_and_indexes(client, monkeypatch):
+    monkeypatch.setattr(columnar, "NOTICE_FACET_ENGINE", "columnar")
+    session = ReadSessionLocal()
+    try:
+        columnar.notice_columns.build(session)
+    finally:
+        session.close()
+    try:
+        client.get("/ipo/list")
+        client.get("/companies/search", params={"keyword": "万科"})
+        snapshot = columnar.notice_columns.snapshot
+        companies = company_index.companies
+        notice = first_notice(client)
+
+        client.post("/notices/favorite", json={"notice_ids": [notice["id"]]})
+
+        hits = result_cache.stats()["hits"]
+        client.get("/ipo/list")
+        assert result_cache.stats()["hits"] == hits + 1
+        client.get("/companies/search", params={"keyword": "万科"})
+        assert company_index.companies is companies
+        # The snapshot has no IsFav: the page rows are read from SQLite
+        assert first_notice(client)["IsFav"] == "1"
+        assert columnar.notice_columns.snapshot is snapshot
+    finally:
+        columnar.notice_columns.snapshot = None
@@ -0,0 +1,38 @@
+from app.database import Database
+from app.db import NewsModel, SessionLocal
+
+
+def news_counts():
+    session = SessionLocal()
+    try:
+        total = session.query(NewsModel).count()
+        sector = session.query(NewsModel).filter(NewsModel.inforId.isnot(None)).count()
+        return total - sector, sector
+    finally:
+        session.close()
+
+
+def test_changed_news_csv_keeps_sector_news(database, data_dir):
+    file_news, sector_news = news_counts()
+    assert file_news == 30 and sector_news > 0
+
+    # Changed news.csv, unchanged sector_info.csv
+    with open(f"{data_dir}/news.csv", "a", encoding="utf-8") as f:
+        f.write("E1,新闻追加,2024-03-01,src\n")
+    loader = Database()
+    loader.load_from_directory(data_dir, incremental=True)
+    assert loader.loaded
+
+    assert news_counts() == (31, sector_news)
+
+
+def test_news_model_reload_keeps_sector_news(database, data_dir):
+    _, sector_news = news_counts()
+    Database().load_from_directory(data_dir, model_name="NewsModel")
+    assert news_counts() == (30, sector_news)
+
+
+def test_unchanged_files_are_skipped(database, data_dir):
+    before = news_counts()
+    Database().load_from_directory(data_dir, incremental=True)
+    assert news_counts() == before
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX = "ix_notices_sectorId_PublishDateInt"
+
+
+def has_index(path, name=INDEX):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def drop_index(path, name=INDEX):
+    # A database from before the index was introduced
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(f'DROP INDEX "{name}"')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_importing_the_app_does_not_migrate(database):
+    drop_index(database)
+    env = {**os.environ, "DATABASE_PATH": database}
+    subprocess.run([sys.executable, "-c", "import app.api"], cwd=REPO, env=env, check=True)
+    assert not has_index(database)
+
+    subprocess.run([sys.executable, "manage.py", "migrate"], cwd=REPO, env=env, check=True)
+    assert has_index(database)
+
+
+def test_swap_migrates_only_the_build(database, data_dir):
+    env = {**os.environ, "DATABASE_PATH": database}
+    load = [sys.executable, "manage.py", "load", "--dir", data_dir, "--incremental", "--swap"]
+    subprocess.run(load, cwd=REPO, env=env, check=True)
+    serving = os.path.realpath(database)
+    drop_index(serving)
+
+    subprocess.run(load, cwd=REPO, env=env, check=True)
+    # The previous build served requests throughout; only the new one was migrated
+    assert os.path.realpath(database) != serving
+    assert not has_index(serving)
+    assert has_index(database)
+
+
+def test_migration_drops_original_single_column_indexes(database):
+    from app.db import init_db
+
+    # The notice indexes of the original schema (index=True on each column)
+    columns = ["sector", "Category", "Industry", "MarketType", "NoticeType", "Province", "Publisher"]
+    conn = sqlite3.connect(database)
+    try:
+        for column in columns:
+            conn.execute(f'CREATE INDEX "ix_notices_{column}" ON notices ("{column}")')
+        conn.commit()
+    finally:
+        conn.close()
+
+    init_db()
+    for column in columns:
+        assert not has_index(database, f"ix_notices_{column}")
+    assert has_index(database)
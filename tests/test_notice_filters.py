@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+
+
+def count(database, sql, *params):
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute(sql, params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("exclude", [["不存在"], ["银行"], ["银行", "不存在"]])
+def test_exclude_never_matches_null(client, database, exclude):
+    # Like a string NOT IN, an exclude filter drops notices without a value
+    response = client.post("/notices", json={
+        "sector": "三市公告", "industry_exclude": exclude, "count_strategy": "exact",
+    })
+    assert response.status_code == 200
+    placeholders = ", ".join("?" * len(exclude))
+    expected = count(
+        database,
+        f"SELECT count(*) FROM notices WHERE sector = ? AND Industry NOT IN ({placeholders})",
+        "三市公告", *exclude
+    )
+    assert count(database, "SELECT count(*) FROM notices WHERE sector = '三市公告' AND Industry IS NULL") > 0
+    assert response.json()["total"] == expected
+
+
+def test_include_matches_values(client, database):
+    response = client.post("/notices", json={
+        "sector": "三市公告", "industry": ["银行", "不存在"], "province": ["北京"], "count_strategy": "exact",
+    })
+    expected = count(
+        database,
+        "SELECT count(*) FROM notices WHERE sector = '三市公告' AND Industry = '银行' AND Province = '北京'"
+    )
+    assert response.json()["total"] == expected > 0
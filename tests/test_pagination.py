@@ -0,0 +1,80 @@
+import pytest
+
+from app.cache import result_cache
+
+PAGE_SIZE = 7
+
+
+def walk_pages(fetch):
+    """Items of every page by page number, and by following next_cursor."""
+    by_page, page = [], 1
+    while True:
+        items = fetch({"page": page})["data"]
+        if not items:
+            break
+        by_page += items
+        page += 1
+    by_cursor, after = [], None
+    while True:
+        result = fetch({"after": after} if after else {})
+        by_cursor += result["data"]
+        after = result["next_cursor"]
+        if not after:
+            break
+    return by_page, by_cursor
+
+
+def ids(items):
+    return [item["id"] for item in items]
+
+
+@pytest.mark.parametrize("facet_engine", ["sql", "columnar"])
+@pytest.mark.parametrize("body", [
+    {"sector": "三市公告"},
+    {"sector": "债券公告", "notice_type": ["年度报告", "临时公告"]},
+    {"sector": "科创板反馈问答", "start_date": "2022-01-01", "end_date": "2024-12-31"},
+])
+def test_notices_cursor_matches_offset(client, engine, facet_engine, body):
+    engine(facet_engine)
+
+    def fetch(extra):
+        result_cache.invalidate()
+        return client.post("/notices", json={**body, "count_strategy": "exact", "page_size": PAGE_SIZE, **extra}).json()
+
+    by_page, by_cursor = walk_pages(fetch)
+    assert len(by_page) == fetch({})["total"]
+    assert ids(by_cursor) == ids(by_page)
+    assert len(set(ids(by_page))) == len(by_page)
+    # The cursor of any offset page (the columnar engine makes its own) continues it
+    for page in range(1, len(by_page) // PAGE_SIZE + 1):
+        cursor = fetch({"page": page})["next_cursor"]
+        assert ids(fetch({"after": cursor})["data"]) == ids(by_page[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+
+
+@pytest.mark.parametrize("order_by", ["desc", "asc"])
+def test_search_cursor_matches_offset(client, order_by):
+    def fetch(extra):
+        body = {"keyword": "收购事项", "sector": "三市公告", "limit": PAGE_SIZE, "order_by": order_by, **extra}
+        return client.post("/notices/search", json=body).json()
+
+    by_page, by_cursor = walk_pages(fetch)
+    assert len(by_page) == fetch({})["total"]
+    assert ids(by_cursor) == ids(by_page)
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/events", {}),
+    ("/news", {}),
+    ("/ipo/list", {}),
+    ("/ipo/rank/list", {}),
+    ("/ipo/review/list", {}),
+    ("/timeline/details", {"stock_code": "600519"}),
+])
+def test_list_cursor_matches_offset(client, path, params):
+    def fetch(extra):
+        result_cache.invalidate()
+        return client.get(path, params={**params, "page_size": PAGE_SIZE, **extra}).json()
+
+    by_page, by_cursor = walk_pages(fetch)
+    assert by_page
+    assert ids(by_cursor) == ids(by_page)
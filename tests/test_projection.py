@@ -0,0 +1,46 @@
+import pytest
+
+from app import serialization
+from app.cache import result_cache
+from app.models import NoticeListResponse
+
+
+def notices(client, **body):
+    result_cache.invalidate()
+    return client.post("/notices", json={"sector": "三市公告", "page_size": 5, **body}).json()
+
+
+def test_notice_fields_narrow_the_response(client):
+    full = notices(client)
+    narrow = notices(client, fields=["Title"])
+    assert set(narrow["data"][0]) == {"id", "PublishDate", "Title"}
+    assert [dict(id=n["id"], PublishDate=n["PublishDate"], Title=n["Title"]) for n in full["data"]] == narrow["data"]
+    # Without fields every Notice field is returned, unselected or not
+    assert len(full["data"][0]) > 30
+    assert {k: v for k, v in narrow.items() if k != "data"} == {k: v for k, v in full.items() if k != "data"}
+
+
+def test_ipo_list_fields(client):
+    result_cache.invalidate()
+    data = client.get("/ipo/list", params={"fields": "Issuer,LatestDate"}).json()["data"]
+    assert data and all(set(item) == {"id", "Issuer", "LatestDate"} for item in data)
+
+
+@pytest.mark.parametrize("path", ["/ipo/rank/list", "/ipo/review/list"])
+def test_ipo_rank_and_review_fields(client, path):
+    data = client.get(path, params={"fields": "Entity"}).json()["data"]
+    assert data and all(set(item) == {"id", "Entity"} for item in data)
+
+
+def test_fast_path_matches_pydantic_without_unset_fields(monkeypatch):
+    result = {
+        "total": 2, "total_display": "2", "count_strategy": "exact",
+        "data": [{"id": "1", "PublishDate": "2024-01-01", "Title": "t"}, {"id": "2", "PublishDate": None}],
+        "facets": {}, "next_cursor": None,
+    }
+    dumps = {}
+    for mode in ("all", "none"):
+        monkeypatch.setattr(serialization, "FAST_JSON", mode)
+        dumps[mode] = serialization.response_serializer("notices", NoticeListResponse, exclude_unset=True)(result)
+    assert dumps["all"] == dumps["none"]
+    assert b'"Title"' in dumps["all"] and b'"Preview"' not in dumps["all"]
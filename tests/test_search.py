@@ -0,0 +1,37 @@
+import sqlite3
+
+
+def company_search(client, **body):
+    response = client.post("/notices/search", json={"keyword": "收购事项", "sector": "三市公告", **body})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_company_groups_skip_notices_without_company(client, database):
+    conn = sqlite3.connect(database)
+    try:
+        without_company = conn.execute(
+            "SELECT count(*) FROM notices WHERE sector = '三市公告' AND StockCode IS NULL"
+        ).fetchone()[0]
+        companies = conn.execute(
+            "SELECT count(DISTINCT StockCode) FROM notices WHERE sector = '三市公告' AND StockCode IS NOT NULL"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+    assert without_company > 0
+
+    result = company_search(client, order_by="company", limit=100)
+    assert result["total"] == companies
+    assert len(result["data"]) == companies
+    for group in result["data"]:
+        assert group["StockCode"] is not None
+        assert group["count"] == len(group["data"]) > 0
+        assert all(item["StockCode"] == group["StockCode"] for item in group["data"])
+
+
+def test_company_pages_do_not_overlap(client):
+    first = company_search(client, order_by="company", limit=5, page=1)
+    second = company_search(client, order_by="company", limit=5, page=2)
+    codes = [g["StockCode"] for g in first["data"]] + [g["StockCode"] for g in second["data"]]
+    assert len(codes) == len(set(codes)) == 10
+    assert first["total"] == second["total"]